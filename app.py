@@ -1,83 +1,419 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, jsonify, send_file, abort, stream_with_context, g, has_request_context
+from datetime import datetime, timedelta
+import click
+import cProfile
+import hashlib
+import json
+import logging
+import math
+import mimetypes
 import os
+import random
+import sqlite3
+import threading
+import time
 from config import config
+from assets import ENCODINGS, build_manifest, load_manifest, precompressed_path, stale_entries
+from brevo import DISABLED_WARNING as BREVO_DISABLED_WARNING, BrevoClient, BrevoRateLimited
+from emails import CONFIRMATION_SUBJECT, render_confirmation_email, response_label
+from export import csv_chunks, xlsx_available, xlsx_chunks
+from idempotency import IdempotencyCache, IdempotencyConflict
+from images import available_widths, build_all_variants, choose_width, get_variant, negotiate_format, source_info
+from live import ChangeSignal, sse_message
+from logs import configure_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from ratelimit import MemoryBuckets, RateLimit, SQLiteBuckets
+from reminders import campaign_progress, create_campaign, dispatch_reminder_batch, due_campaign, retry_failed
+from migrations import upgrade_schema
+from invitations import detect_format, import_invitations, read_records
+from models import (Guest, GuestMember, EmailOutbox, Invitation, ReminderCampaign, RsvpStats, awaiting_reply, REMINDER_AUDIENCES, STAT_FIELDS, STAT_SOURCE_COLUMNS, db,
+                    normalize_name, normalize_email, compute_rsvp_stats, rebuild_rsvp_stats, get_rsvp_stats,
+                    compute_room_demand, get_room_demand, guest_stat_contribution, apply_stats_delta,
+                    apply_room_demand_delta, room_party_size, upsert_insert)
+from planning import build_plan, parse_room_types
+from sqlalchemy import event
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.utils import safe_join
 
-# Get configuration based on environment
-config_name = os.environ.get('FLASK_ENV', 'development')
-app_config = config[config_name]
+logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-app.config.from_object(app_config)
+ROOT = os.path.dirname(os.path.abspath(__file__))
 
-# Custom Jinja filter for parsing JSON
-@app.template_filter('from_json')
-def from_json(value):
-    import json
-    try:
-        return json.loads(value)
-    except:
-        return []
+main = Blueprint('main', __name__, cli_group=None)
 
-# Email configuration
-if not app_config.BREVO_API_KEY:
-    print("Warning: BREVO_API_KEY not set. Email functionality will be disabled.")
-    print("To test email functionality locally:")
-    print("1. Create a .env file in your project root")
-    print("2. Add your Brevo API key: BREVO_API_KEY=your_api_key_here")
-    print("3. Get your API key from: https://app.brevo.com/settings/keys/api")
-
-db = SQLAlchemy(app)
-
-# Database Models
-class Guest(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
-    guest_count = db.Column(db.Integer, default=1)
-    guest_names = db.Column(db.Text)  # JSON string of guest names
-    message = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Welcome Lunch
-    welcome_lunch = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
-    
-    # Wedding Day
-    wedding_attendance = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
-    
-    # Accommodation
-    accommodation = db.Column(db.String(10), nullable=False)  # 'yes', 'no'
+def create_app(config_name=None, overrides=None):
+    """Build the Flask app for `config_name` (FLASK_ENV by default).
+
+    Nothing here touches the database schema; run `flask --app app upgrade-db`
+    once per deploy before starting the workers.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config[config_name or os.environ.get('FLASK_ENV', 'development')])
+    app.config.update(overrides or {})
+    app.config['IMAGE_CACHE_DIR'] = app.config['IMAGE_CACHE_DIR'] or os.path.join(app.instance_path, 'image_cache')
+    app.config['PROFILE_DIR'] = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+    app.config['RATE_LIMIT_SQLITE_PATH'] = (app.config['RATE_LIMIT_SQLITE_PATH']
+                                            or os.path.join(app.instance_path, 'ratelimit.db'))
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+
+    db.init_app(app)
+    with app.app_context():
+        event.listen(db.engine, 'connect', sqlite_pragmas(app.config))
+        event.listen(db.engine, 'before_cursor_execute', start_query_timer)
+        event.listen(db.engine, 'after_cursor_execute', record_query_time)
+
+    # Replays of the same submission (double clicks, client retries) within the
+    # TTL get the first response back without touching the database
+    app.extensions['idempotency_cache'] = IdempotencyCache(ttl=app.config['IDEMPOTENCY_TTL_SECONDS'])
+    if app.config['RATE_LIMIT_ENABLED']:
+        app.extensions['rate_buckets'] = rate_buckets(app.config)
+        app.extensions['rsvp_rate_limits'] = {
+            'ip': RateLimit(app.config['RATE_LIMIT_IP_BURST'], app.config['RATE_LIMIT_IP_PER_HOUR']),
+            'email': RateLimit(app.config['RATE_LIMIT_EMAIL_BURST'], app.config['RATE_LIMIT_EMAIL_PER_HOUR'])
+        }
+    app.extensions['room_types'] = parse_room_types(app.config['PLANNING_ROOM_TYPES'])
+    # Created on first use: the rendered landing page, the Brevo client and the
+    # in-process outbox dispatcher
+    app.extensions['home_page'] = None
+    app.extensions['brevo_client'] = None
+    app.extensions['brevo_client_lock'] = threading.Lock()
+    app.extensions['outbox_thread'] = None
+    app.extensions['outbox_thread_lock'] = threading.Lock()
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # Fingerprinted static assets: url_for('static', ...) emits the hashed name from
+    # static/manifest.json, and hashed names are served with immutable caching.
+    # Debug mode serves the plain files so edits show up without a rebuild.
+    manifest = {} if app.debug else load_manifest(app.static_folder)
+    app.extensions['static_manifest'] = manifest
+    app.extensions['hashed_static_files'] = {hashed: filename for filename, hashed in manifest.items()}
+    app.view_functions['static'] = static_asset
+
+    app.register_blueprint(main)
+    return app
+
+def rate_buckets(config):
+    """Token buckets for the configured RATE_LIMIT_BACKEND"""
+    if config['RATE_LIMIT_BACKEND'] == 'sqlite':
+        os.makedirs(os.path.dirname(config['RATE_LIMIT_SQLITE_PATH']) or '.', exist_ok=True)
+        return SQLiteBuckets(config['RATE_LIMIT_SQLITE_PATH'], max_keys=config['RATE_LIMIT_MAX_KEYS'])
+    if config['RATE_LIMIT_BACKEND'] == 'memory':
+        return MemoryBuckets(max_keys=config['RATE_LIMIT_MAX_KEYS'])
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {config['RATE_LIMIT_BACKEND']!r}")
+
+def sqlite_pragmas(config):
+    """Connect listener applying the SQLite pragmas from config.py to every new connection"""
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection) or not config['SQLITE_TUNING']:
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        cursor.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+        cursor.close()
+    return configure_sqlite_connection
+
+# Metrics, served in the Prometheus text format from /metrics
+metrics = Registry()
+REQUEST_LATENCY = metrics.histogram('http_request_duration_seconds', 'Time to produce a response, by endpoint',
+                                    ['method', 'endpoint', 'status'])
+REQUEST_QUERIES = metrics.histogram('http_request_db_queries', 'Database queries run per request, by endpoint',
+                                    ['endpoint'], buckets=(0, 1, 2, 5, 10, 25, 50, 100))
+DB_QUERY_LATENCY = metrics.histogram('db_query_duration_seconds', 'Database query time, by endpoint or background',
+                                     ['source'])
+BREVO_LATENCY = metrics.histogram('brevo_request_duration_seconds', 'Brevo API call time, by outcome',
+                                  ['outcome'])
+RATE_LIMITED = metrics.counter('rsvp_rate_limited', 'RSVP submissions turned away by the rate limiter, by key',
+                               ['key'])
+REMINDERS = metrics.counter('reminder_deliveries', 'Reminder campaign deliveries processed, by outcome',
+                            ['outcome'])
+
+# The start time lives on the statement's execution context, which is dropped
+# with the statement, because after_cursor_execute does not run for one that fails
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started_at = time.perf_counter()
+
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, 'query_started_at', None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    if has_request_context():
+        DB_QUERY_LATENCY.observe(elapsed, source=request.endpoint or 'unmatched')
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+    else:
+        DB_QUERY_LATENCY.observe(elapsed, source='background')
+
+@main.before_app_request
+def start_request_timer():
+    g.request_started_at = time.perf_counter()
+    if current_app.config['PROFILING_ENABLED'] and request.headers.get('X-Profile'):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@main.after_app_request
+def record_request_metrics(response):
+    """Record latency and query count; streamed bodies are timed to their first byte"""
+    elapsed = time.perf_counter() - g.get('request_started_at', time.perf_counter())
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+    REQUEST_QUERIES.observe(g.get('db_queries', 0), endpoint=endpoint)
     
-    # Farewell Lunch
-    farewell_lunch = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_dir = current_app.config['PROFILE_DIR']
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{endpoint}.prof")
+        profiler.dump_stats(path)
+        response.headers['X-Profile-File'] = os.path.basename(path)
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={g.get("db_seconds", 0.0) * 1000:.1f};desc="{g.get("db_queries", 0)} queries"'
+        )
+        logger.info('Request profiled', extra={'endpoint': endpoint, 'profile': path,
+                                               'duration_ms': round(elapsed * 1000, 1)})
+    return response
+
+def observe_brevo_request(seconds, outcome):
+    BREVO_LATENCY.observe(seconds, outcome=outcome)
+
+# Landing page cache: the home page does not depend on the database, so it is
+# rendered once per process (or per template change in debug mode) and served
+# with validators so repeat visits get a 304
+HOME_PAGE_TEMPLATES = ('index.html', 'base.html')
+
+def _home_templates_mtime():
+    return max(os.path.getmtime(os.path.join(current_app.root_path, current_app.template_folder, name))
+               for name in HOME_PAGE_TEMPLATES)
+
+def get_home_page():
+    """Return the cached landing page body with its ETag and Last-Modified"""
+    home_page = current_app.extensions['home_page']
+    if home_page is not None and not current_app.debug:
+        return home_page
+    mtime = _home_templates_mtime()
+    if home_page is None or home_page['mtime'] != mtime:
+        body = render_template('index.html').encode('utf-8')
+        home_page = current_app.extensions['home_page'] = {
+            'mtime': mtime,
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'last_modified': datetime.utcfromtimestamp(int(mtime))
+        }
+    return home_page
+
+@main.app_url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        manifest = current_app.extensions['static_manifest']
+        values['filename'] = manifest.get(values['filename'], values['filename'])
+
+def static_asset(filename):
+    """Serve static files, preferring precompressed variants of hashed names"""
+    original = current_app.extensions['hashed_static_files'].get(filename)
+    if original is None:
+        return current_app.send_static_file(filename)
     
-    def __repr__(self):
-        return f'<Guest {self.name}>'
+    response = None
+    for encoding, suffix in ENCODINGS:
+        path = precompressed_path(current_app.static_folder, filename, suffix)
+        if encoding in request.accept_encodings and os.path.isfile(path):
+            response = send_file(path, mimetype=mimetypes.guess_type(original)[0], etag=filename + suffix,
+                                 max_age=31536000, conditional=False)
+            response.content_encoding = encoding
+            break
+    if response is None:
+        response = send_file(os.path.join(current_app.static_folder, original), etag=filename,
+                             max_age=31536000, conditional=False)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+# Responsive images: resized AVIF/WebP/JPEG variants cached on disk
+IMAGES_FOLDER = os.path.join(ROOT, 'static', 'images')
+SCHEDULE_IMAGE = os.path.join(ROOT, 'materials', 'crystal and yang wedding.png')
+
+def send_image_variant(path, immutable):
+    """Serve the variant of `path` matching the `w` parameter and Accept header"""
+    width = choose_width(request.args.get('w', type=int), source_info(path)[1])
+    fmt, mimetype, ext = negotiate_format(request.accept_mimetypes)
+    variant = get_variant(path, current_app.config['IMAGE_CACHE_DIR'], width, fmt, ext)
+    response = send_file(variant, mimetype=mimetype, etag=os.path.basename(variant),
+                         max_age=31536000 if immutable else 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+@main.app_template_global()
+def image_url(filename, width=None):
+    """Content-addressed URL for an image in static/images"""
+    path = os.path.join(IMAGES_FOLDER, filename)
+    if not os.path.isfile(path):
+        return url_for('static', filename='images/' + filename)
+    return url_for('main.image', digest=source_info(path)[0], filename=filename, w=width)
+
+@main.app_template_global()
+def image_srcset(filename):
+    path = os.path.join(IMAGES_FOLDER, filename)
+    if not os.path.isfile(path):
+        return ''
+    return ', '.join(f"{image_url(filename, width)} {width}w" for width in available_widths(path))
 
 # Routes
-@app.route('/')
+@main.route('/')
 def home():
-    guests = Guest.query.order_by(Guest.created_at.desc()).all()
-    return render_template('index.html', guests=guests)
+    page = get_home_page()
+    response = current_app.response_class(page['body'], mimetype='text/html')
+    response.set_etag(page['etag'])
+    response.last_modified = page['last_modified']
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-@app.route('/rsvp')
+@main.route('/rsvp')
 def rsvp():
-    return redirect(url_for('home') + '#rsvp')
+    return redirect(url_for('main.home') + '#rsvp')
 
-@app.route('/faq')
+@main.route('/faq')
 def faq():
-    return redirect(url_for('home') + '#faq')
+    return redirect(url_for('main.home') + '#faq')
 
-@app.route('/schedule')
+@main.route('/schedule')
 def schedule():
-    return send_from_directory('materials', 'crystal and yang wedding.png')
+    return send_image_variant(SCHEDULE_IMAGE, immutable=False)
+
+@main.route('/img/<digest>/<path:filename>')
+def image(digest, filename):
+    path = safe_join(IMAGES_FOLDER, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    current_digest = source_info(path)[0]
+    if digest != current_digest:
+        return redirect(url_for('main.image', digest=current_digest, filename=filename, w=request.args.get('w', type=int)))
+    return send_image_variant(path, immutable=True)
+
+# Abuse protection: every submission spends a token from its client IP's and
+# its email address's buckets before anything else runs, so a flood is turned
+# away without touching the database, the idempotency cache or Brevo
+RATE_LIMITED_BODY = json.dumps({
+    'success': False,
+    'message': 'Too many RSVP submissions. Please wait a few minutes and try again.'
+})
 
-@app.route('/submit_rsvp', methods=['POST'])
+def rsvp_rate_limit_wait():
+    """Seconds this client must wait before submitting again, or 0"""
+    buckets = current_app.extensions.get('rate_buckets')
+    if buckets is None:
+        return 0
+    limits = current_app.extensions['rsvp_rate_limits']
+    wait = buckets.spend(f'ip:{request.remote_addr}', limits['ip'])
+    if wait:
+        RATE_LIMITED.inc(key='ip')
+        return wait
+    email = request.form.get('email')
+    if email:
+        wait = buckets.spend(f'email:{normalize_email(email)}', limits['email'])
+        if wait:
+            RATE_LIMITED.inc(key='email')
+    return wait
+
+@main.route('/submit_rsvp', methods=['POST'])
 def submit_rsvp():
+    wait = rsvp_rate_limit_wait()
+    if wait:
+        return current_app.response_class(RATE_LIMITED_BODY, status=429, mimetype='application/json',
+                                          headers={'Retry-After': str(math.ceil(wait))})
+    
+    # Only client-supplied keys are cached: a form posted again with answers it
+    # sent earlier is a real change back, and the email upsert already makes
+    # plain repeats harmless
+    key = request.headers.get('Idempotency-Key')
+    if not key:
+        body, status = process_rsvp()
+        return jsonify(body), status
+    idempotency_cache = current_app.extensions['idempotency_cache']
+    fingerprint = IdempotencyCache.fingerprint(request.form.items(multi=True))
+    try:
+        replay = idempotency_cache.begin(key, fingerprint)
+    except IdempotencyConflict:
+        return jsonify({
+            'success': False,
+            'message': 'This request was already submitted with different details. Please reload the page and try again.'
+        }), 422
+    if replay is not None:
+        body, status = replay
+        response = jsonify(body)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response, status
+    
+    body, status = process_rsvp()
+    idempotency_cache.finish(key, (body, status) if status < 500 else None)
+    return jsonify(body), status
+
+GUEST_UPSERT_COLUMNS = ('name', 'email', 'guest_count', 'message', 'welcome_lunch',
+                        'wedding_attendance', 'accommodation', 'farewell_lunch', 'updated_at')
+def upsert_guest(values, guest_names):
+    """Create the party, or update the existing party with the same email.
+
+    The guest row is inserted by INSERT ... ON CONFLICT DO NOTHING on the
+    unique normalized email. Only when that finds an existing party are its
+    previous values read, with the row locked FOR UPDATE (on SQLite the
+    INSERT already holds the database write lock), so concurrent submissions
+    for one email each see what the one before them wrote. Party members are
+    replaced and the statistics row and room demand are adjusted by the
+    difference. Returns (guest_id, created).
+    """
+    # A new party gets the same created_at and updated_at, which is how the
+    # live admin feed tells new RSVPs from edits
+    now = datetime.utcnow()
+    values = dict(values, updated_at=now)
+    guest_id = None
+    dialect_insert = upsert_insert(db.engine.dialect.name)
+    if dialect_insert is not None:
+        guest_id = db.session.execute(
+            dialect_insert(Guest).values(created_at=now, **values)
+            .on_conflict_do_nothing(index_elements=[Guest.email_normalized])
+            .returning(Guest.id)
+        ).scalar()
+    previous = None
+    if guest_id is None:
+        previous = db.session.execute(
+            db.select(Guest.id, *(getattr(Guest, column) for column in STAT_SOURCE_COLUMNS))
+            .where(Guest.email_normalized == values['email_normalized'])
+            .with_for_update()
+        ).first()
+        if previous is not None:
+            guest_id = previous.id
+            db.session.execute(db.update(Guest).where(Guest.id == guest_id)
+                               .values(**{column: values[column] for column in GUEST_UPSERT_COLUMNS}))
+        else:
+            guest_id = db.session.execute(
+                db.insert(Guest).values(created_at=now, **values)
+            ).inserted_primary_key[0]
+    
+    db.session.execute(db.delete(GuestMember).where(GuestMember.guest_id == guest_id))
+    db.session.execute(db.insert(GuestMember), [
+        {'guest_id': guest_id, 'position': position, 'name': name, 'name_normalized': normalize_name(name)}
+        for position, name in enumerate(guest_names)
+    ])
+    
+    # Core statements bypass the Guest mapper events, so apply the aggregate deltas here
+    new = guest_stat_contribution(*(values[column] for column in STAT_SOURCE_COLUMNS))
+    old = guest_stat_contribution(*previous[1:]) if previous else dict.fromkeys(STAT_FIELDS, 0)
+    apply_stats_delta(db.session.connection(), {field: new[field] - old[field] for field in STAT_FIELDS})
+    apply_room_demand_delta(db.session.connection(),
+                            room_party_size(previous.guest_count, previous.accommodation) if previous else None,
+                            room_party_size(values['guest_count'], values['accommodation']))
+    return guest_id, previous is None
+
+def process_rsvp():
+    """Validate and store the submitted RSVP. Returns (response body, status)."""
     try:
-        import json
-        
         # Primary contact information
         name = request.form.get('name')
         email = request.form.get('email')
@@ -86,7 +422,6 @@ def submit_rsvp():
         
         # Guest names (array from form)
         guest_names_list = request.form.getlist('guest_names[]')
-        guest_names_json = json.dumps(guest_names_list)
         
         # Event attendance
         welcome_lunch = request.form.get('welcome_lunch')
@@ -94,12 +429,12 @@ def submit_rsvp():
         accommodation = request.form.get('accommodation')
         farewell_lunch = request.form.get('farewell_lunch')
         
-        # Debug: Print received values
-        print(f"Debug - Received form data:")
-        print(f"  welcome_lunch: '{welcome_lunch}'")
-        print(f"  wedding_attendance: '{wedding_attendance}'")
-        print(f"  accommodation: '{accommodation}'")
-        print(f"  farewell_lunch: '{farewell_lunch}'")
+        logger.debug('RSVP received', extra={
+            'welcome_lunch': welcome_lunch,
+            'wedding_attendance': wedding_attendance,
+            'accommodation': accommodation,
+            'farewell_lunch': farewell_lunch
+        })
         
         # Validate required fields
         required_fields = {
@@ -114,284 +449,695 @@ def submit_rsvp():
         
         missing_fields = [field for field, value in required_fields.items() if not value]
         if missing_fields:
-            return jsonify({
+            return {
                 'success': False,
                 'message': f'Please fill in all required fields: {", ".join(missing_fields)}'
-            }), 400
+            }, 400
         
         # Validate guest names match guest count
         # Note: guest_names_list now includes the primary contact name
         if len(guest_names_list) != guest_count:
-            return jsonify({
+            return {
                 'success': False,
                 'message': f'Please provide names for all {guest_count} guest(s). You provided {len(guest_names_list)} names.'
-            }), 400
+            }, 400
         
-        # Create new guest
-        guest = Guest(
-            name=name,
-            email=email,
-            guest_count=guest_count,
-            guest_names=guest_names_json,
-            message=message,
-            welcome_lunch=welcome_lunch,
-            wedding_attendance=wedding_attendance,
-            accommodation=accommodation,
-            farewell_lunch=farewell_lunch
-        )
+        # Create the guest, or update the party that already replied from this email
+        guest_id, created = upsert_guest({
+            'name': name,
+            'email': email,
+            'email_normalized': normalize_email(email),
+            'guest_count': guest_count,
+            'message': message,
+            'welcome_lunch': welcome_lunch,
+            'wedding_attendance': wedding_attendance,
+            'accommodation': accommodation,
+            'farewell_lunch': farewell_lunch
+        }, guest_names_list)
         
-        db.session.add(guest)
-        db.session.commit()
+        # Queue the confirmation email in the same transaction as the guest row;
+        # the outbox dispatcher delivers it once the commit has finished
+        email_queued = False
+        if current_app.config['BREVO_API_KEY']:
+            db.session.add(EmailOutbox(
+                guest_id=guest_id,
+                recipient=email,
+                payload=json.dumps({
+                    'email': email,
+                    'name': name,
+                    'guest_names': guest_names_list,
+                    'welcome_lunch': welcome_lunch,
+                    'wedding_attendance': wedding_attendance,
+                    'accommodation': accommodation,
+                    'farewell_lunch': farewell_lunch
+                })
+            ))
+            email_queued = True
+        else:
+            logger.warning('BREVO_API_KEY not configured, confirmation email not queued', extra={'guest_id': guest_id})
         
-        # Send confirmation email
-        email_sent = False
-        email_error = None
-        try:
-            if app_config.BREVO_API_KEY:
-                send_confirmation_email(email, name, guest_names_list, welcome_lunch, wedding_attendance, accommodation, farewell_lunch)
-                email_sent = True
-                print(f"Confirmation email sent successfully to {email}")
-            else:
-                print("Warning: BREVO_API_KEY not configured. Email not sent.")
-                email_error = "Email service not configured"
-        except Exception as email_error:
-            print(f"Email sending failed: {email_error}")
-            # Continue anyway - the RSVP was saved successfully
+        db.session.commit()
+        guest_change_signal.notify()
+        logger.info('RSVP stored', extra={'guest_id': guest_id, 'new_party': created, 'guest_count': guest_count})
         
         response_data = {
             'success': True,
-            'message': 'RSVP submitted successfully!'
+            'message': 'RSVP submitted successfully!' if created else 'RSVP updated successfully!'
         }
         
-        if email_sent:
-            response_data['message'] += ' A confirmation email has been sent to your email address.'
-        elif email_error:
-            response_data['message'] += f' (Note: Email notification failed: {email_error})'
+        if email_queued:
+            response_data['message'] += ' A confirmation email will be sent to your email address shortly.'
+        else:
+            response_data['message'] += ' (Note: Email notification failed: Email service not configured)'
         
-        return jsonify(response_data)
+        return response_data, 200
         
-    except Exception as e:
-        print(f"RSVP submission error: {e}")
-        return jsonify({
+    except Exception:
+        db.session.rollback()
+        logger.exception('RSVP submission failed')
+        return {
             'success': False,
             'message': 'There was an error submitting your RSVP. Please try again.'
-        }), 500
+        }, 500
 
-@app.route('/admin')
+@main.route('/admin')
 def admin():
     # Simple admin view - in production, add proper authentication
-    guests = Guest.query.order_by(Guest.created_at.desc()).all()
+    # Guest rows are fetched page by page from /admin/api/guests. The stream
+    # cursor is read before the statistics, so it is never newer than they are
+    stream_cursor = encode_stream_cursor(latest_change_cursor(), current_stats_version())
+    return render_template('admin.html', stats=get_rsvp_stats(), plan=current_plan(), page_size=ADMIN_PAGE_SIZE,
+                           stream_cursor=stream_cursor)
+
+def current_plan():
+    """Capacity plan from the maintained statistics row and room demand histogram"""
+    invited_guests = current_app.config['PLANNING_INVITED_GUESTS'] or db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(Invitation.party_size), 0))
+    ).scalar()
+    return build_plan(get_rsvp_stats(), get_room_demand(), current_app.extensions['room_types'],
+                      invited_guests=invited_guests,
+                      catering_buffer=current_app.config['PLANNING_CATERING_BUFFER'])
+
+@main.route('/admin/api/planning')
+def admin_planning_api():
+    """Event headcounts, catering forecasts and room allocation, confirmed and projected"""
+    return jsonify({'success': True, 'plan': current_plan()})
+
+# Admin guest listing: keyset pagination on (created_at, id), newest first
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+GUEST_FILTERS = {
+    'wedding_attendance': ('attending', 'not_attending'),
+    'welcome_lunch': ('attending', 'not_attending'),
+    'farewell_lunch': ('attending', 'not_attending'),
+    'accommodation': ('yes', 'no')
+}
+
+def encode_guest_cursor(guest):
+    return f"{guest.created_at.isoformat()}_{guest.id}"
+
+def decode_guest_cursor(cursor):
+    created_at, guest_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(guest_id)
+
+def guest_page(filters, cursor=None, limit=ADMIN_PAGE_SIZE, search=None):
+    """Return one page of guests after `cursor` and the cursor for the next page"""
+    query = Guest.query.options(db.selectinload(Guest.members))
+    for column, value in filters.items():
+        query = query.filter(getattr(Guest, column) == value)
+    if search:
+        query = query.filter(Guest.id.in_(members_matching(search)))
+    if cursor:
+        created_at, guest_id = decode_guest_cursor(cursor)
+        query = query.filter(db.or_(
+            Guest.created_at < created_at,
+            db.and_(Guest.created_at == created_at, Guest.id < guest_id)
+        ))
+    guests = query.order_by(Guest.created_at.desc(), Guest.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_guest_cursor(guests[limit - 1]) if len(guests) > limit else None
+    return guests[:limit], next_cursor
+
+def members_matching(search):
+    """Guest ids with a party member whose name starts with `search`.
+
+    A range on the normalized name instead of LIKE keeps the lookup on the
+    name index for every backend.
+    """
+    prefix = normalize_name(search)
+    return db.select(GuestMember.guest_id).where(
+        GuestMember.name_normalized >= prefix,
+        GuestMember.name_normalized < prefix + '\uffff'
+    )
+
+def compute_member_headcounts():
+    """Count individual party members per event with one joined aggregate"""
+    def people_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    row = db.session.execute(
+        db.select(
+            db.func.count(GuestMember.id),
+            people_where(Guest.wedding_attendance == 'attending'),
+            people_where(Guest.welcome_lunch == 'attending'),
+            people_where(Guest.farewell_lunch == 'attending'),
+            people_where(Guest.accommodation == 'yes')
+        ).join(Guest, GuestMember.guest_id == Guest.id)
+    ).one()
+    return dict(zip(('people', 'wedding', 'welcome_lunch', 'farewell_lunch', 'accommodation'),
+                    (int(value) for value in row)))
+
+@main.route('/admin/api/headcounts')
+def admin_headcounts_api():
+    return jsonify({'success': True, 'headcounts': compute_member_headcounts()})
+
+def parse_guest_filters(args):
+    """Event filters from the query string; raises ValueError on unknown values"""
+    filters = {}
+    for column, allowed in GUEST_FILTERS.items():
+        value = args.get(column)
+        if value:
+            if value not in allowed:
+                raise ValueError(f'Invalid value for {column}')
+            filters[column] = value
+    return filters
+
+def page_limit(args):
+    """The ?limit page size, ADMIN_PAGE_SIZE when missing or zero, clamped to 1..ADMIN_MAX_PAGE_SIZE"""
+    limit = args.get('limit', ADMIN_PAGE_SIZE, type=int) or ADMIN_PAGE_SIZE
+    return max(1, min(limit, ADMIN_MAX_PAGE_SIZE))
+
+@main.route('/admin/api/guests')
+def admin_guests_api():
+    try:
+        filters = parse_guest_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    # Calculate statistics
-    total_primary_contacts = len(guests)
-    total_guests = sum(g.guest_count for g in guests)
+    limit = page_limit(request.args)
+    try:
+        guests, next_cursor = guest_page(filters, request.args.get('cursor'), limit, request.args.get('q'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
     
-    # Wedding attendance stats (based on total guest count)
-    wedding_attending = sum(g.guest_count for g in guests if g.wedding_attendance == 'attending')
+    return jsonify({
+        'success': True,
+        'guests': [guest.to_dict() for guest in guests],
+        'next_cursor': next_cursor
+    })
+
+# Admin live updates: an SSE stream of guests changed after an (updated_at, id)
+# cursor. Streams wake on guest_change_signal for writes in this process and
+# probe the updated_at index every ADMIN_STREAM_POLL_SECONDS for other workers'.
+# Rows are re-read over a short overlap window because updated_at is taken
+# before a writer waits for the database lock, so rows can commit out of order.
+# Event ids also carry the version of the statistics the client has, so a
+# reconnecting dashboard is only sent statistics (and refreshes its plan) when
+# they changed.
+guest_change_signal = ChangeSignal()
+ADMIN_STREAM_BATCH = 100
+ADMIN_STREAM_OVERLAP = timedelta(seconds=10)
+ADMIN_STREAM_KEEPALIVE_SECONDS = 15
+
+def encode_change_cursor(updated_at, guest_id):
+    return f"{updated_at.isoformat()}_{guest_id}"
+
+def latest_change_cursor():
+    latest = db.session.execute(
+        db.select(Guest.updated_at, Guest.id).order_by(Guest.updated_at.desc(), Guest.id.desc()).limit(1)
+    ).first()
+    return encode_change_cursor(*latest) if latest else encode_change_cursor(datetime.utcnow(), 0)
+
+def current_stats_version():
+    """When the statistics row last changed, as the stats part of a stream cursor"""
+    updated_at = db.session.execute(db.select(RsvpStats.updated_at).where(RsvpStats.id == 1)).scalar()
+    return updated_at.isoformat() if updated_at else ''
+
+def encode_stream_cursor(guest_cursor, stats_version):
+    return f"{guest_cursor}~{stats_version}"
+
+def _overlap_start(updated_at):
+    return updated_at - ADMIN_STREAM_OVERLAP if updated_at > datetime.min + ADMIN_STREAM_OVERLAP else datetime.min
+
+def guests_changed_since(since, after_id=0, limit=ADMIN_STREAM_BATCH):
+    return Guest.query.options(db.selectinload(Guest.members)).filter(db.or_(
+        Guest.updated_at > since,
+        db.and_(Guest.updated_at == since, Guest.id > after_id)
+    )).order_by(Guest.updated_at, Guest.id).limit(limit).all()
+
+def admin_stream_events(cursor, stats_version, max_seconds):
+    """Yield SSE messages for changed guests and statistics until `max_seconds` pass.
+
+    Statistics are only sent when their version differs from `stats_version`,
+    the one the client already has. With max_seconds 0 it sends what is
+    pending and returns, and the browser reconnects after ADMIN_STREAM_RETRY_MS.
+    """
+    yield f"retry: {current_app.config['ADMIN_STREAM_RETRY_MS']}\n\n"
+    deadline = time.monotonic() + max_seconds
+    last_message = time.monotonic()
+    sent = {}  # guest id -> updated_at already sent within the overlap window
+    stats = None
+    stats_checked = False
+    generation = guest_change_signal.generation
+    while True:
+        since, after_id = _overlap_start(cursor[0]), 0
+        changed = False
+        while True:
+            guests = guests_changed_since(since, after_id)
+            for guest in guests:
+                if sent.get(guest.id) != guest.updated_at:
+                    sent[guest.id] = guest.updated_at
+                    cursor = max(cursor, (guest.updated_at, guest.id))
+                    changed = True
+                    yield sse_message('guest', guest.to_dict(),
+                                      encode_stream_cursor(encode_change_cursor(*cursor), stats_version))
+            if len(guests) < ADMIN_STREAM_BATCH:
+                break
+            since, after_id = guests[-1].updated_at, guests[-1].id
+        sent = {guest_id: updated_at for guest_id, updated_at in sent.items()
+                if updated_at >= _overlap_start(cursor[0])}
+
+        if changed or not stats_checked:
+            stats_checked = True
+            version = current_stats_version()
+            if version != stats_version:
+                current = get_rsvp_stats()
+                delta = {field: value for field, value in current.items() if stats is None or stats[field] != value}
+                stats, stats_version = current, version
+                if delta:
+                    yield sse_message('stats', delta, encode_stream_cursor(encode_change_cursor(*cursor), stats_version))
+            last_message = time.monotonic()
+        # Release the connection while waiting so an idle stream holds no database resources
+        db.session.close()
+
+        now = time.monotonic()
+        if now >= deadline:
+            return
+        if now - last_message >= ADMIN_STREAM_KEEPALIVE_SECONDS:
+            yield ': keepalive\n\n'
+            last_message = now
+        generation = guest_change_signal.wait(
+            generation, min(current_app.config['ADMIN_STREAM_POLL_SECONDS'], deadline - now)
+        )
+
+@main.route('/admin/api/stream')
+def admin_stream():
+    """Server-Sent Events feed of RSVPs created or updated after the given cursor"""
+    cursor, _, stats_version = (request.headers.get('Last-Event-ID') or request.args.get('cursor') or '').partition('~')
+    try:
+        cursor = decode_guest_cursor(cursor or latest_change_cursor())
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+
+    response = current_app.response_class(
+        stream_with_context(admin_stream_events(cursor, stats_version, current_app.config['ADMIN_STREAM_MAX_SECONDS'])),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@main.route('/admin/api/invitations')
+def admin_invitations_api():
+    """Invitations, oldest first, keyset-paginated on id; ?status=pending for those awaiting a reply"""
+    limit = page_limit(request.args)
+    statement = awaiting_reply() if request.args.get('status') == 'pending' else db.select(Invitation)
+    after = request.args.get('cursor', 0, type=int)
+    invitations = db.session.execute(
+        statement.where(Invitation.id > after).order_by(Invitation.id).limit(limit + 1)
+    ).scalars().all()
+    return jsonify({
+        'success': True,
+        'invitations': [invitation.to_dict() for invitation in invitations[:limit]],
+        'next_cursor': invitations[limit - 1].id if len(invitations) > limit else None
+    })
+
+@main.route('/admin/api/reminders')
+def admin_reminders_api():
+    """Reminder campaigns, newest first, with their delivery counts by status"""
+    campaigns = db.session.execute(
+        db.select(ReminderCampaign).order_by(ReminderCampaign.id.desc()).limit(ADMIN_PAGE_SIZE)
+    ).scalars().all()
+    progress = campaign_progress([campaign.id for campaign in campaigns])
+    return jsonify({
+        'success': True,
+        'campaigns': [dict(campaign.to_dict(), deliveries=progress[campaign.id]) for campaign in campaigns]
+    })
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', csv_chunks),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_chunks)
+}
+
+def export_rows(filters, batch_size=1000):
+    """One row per attendee, streamed from the database `batch_size` rows at a time"""
+    statement = db.select(
+        Guest.id, Guest.name, Guest.email, GuestMember.name, Guest.guest_count,
+        Guest.wedding_attendance, Guest.welcome_lunch, Guest.farewell_lunch,
+        Guest.accommodation, Guest.message, Guest.created_at
+    ).outerjoin(GuestMember, GuestMember.guest_id == Guest.id) \
+        .order_by(Guest.id, GuestMember.position) \
+        .execution_options(yield_per=batch_size)
+    for column, value in filters.items():
+        statement = statement.where(getattr(Guest, column) == value)
+    for (guest_id, name, email, attendee, guest_count, wedding, welcome_lunch,
+         farewell_lunch, accommodation, message, created_at) in db.session.execute(statement):
+        yield (
+            guest_id, name, email, attendee or name, guest_count,
+            response_label(wedding), response_label(welcome_lunch), response_label(farewell_lunch),
+            response_label(accommodation), message or '',
+            created_at.strftime('%Y-%m-%d %H:%M') if created_at else ''
+        )
+
+@main.route('/admin/export')
+def admin_export():
+    """Download the guest list, one line per attendee, as CSV or XLSX"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'Format must be csv or xlsx'}), 400
+    if export_format == 'xlsx' and not xlsx_available():
+        return jsonify({'success': False, 'message': 'XLSX export needs openpyxl installed'}), 501
+    try:
+        filters = parse_guest_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    # Event attendance stats (based on total guest count)
-    welcome_lunch_attending = sum(g.guest_count for g in guests if g.welcome_lunch == 'attending')
-    farewell_lunch_attending = sum(g.guest_count for g in guests if g.farewell_lunch == 'attending')
+    mimetype, writer = EXPORT_FORMATS[export_format]
+    filename = f"rsvps-{datetime.utcnow().strftime('%Y%m%d')}.{export_format}"
+    response = current_app.response_class(stream_with_context(writer(export_rows(filters))), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@main.route('/metrics')
+def metrics_endpoint():
+    """Request, database and Brevo metrics of this worker for Prometheus to scrape"""
+    return current_app.response_class(metrics.render(), content_type=METRICS_CONTENT_TYPE,
+                              headers={'Cache-Control': 'no-store'})
+
+# Brevo client, created on first use and shared by every thread in the worker
+def get_brevo_client():
+    extensions = current_app.extensions
+    if extensions['brevo_client'] is None:
+        with extensions['brevo_client_lock']:
+            if extensions['brevo_client'] is None:
+                extensions['brevo_client'] = BrevoClient(
+                    current_app.config['BREVO_API_KEY'],
+                    base_url=current_app.config['BREVO_API_URL'],
+                    timeout=current_app.config['BREVO_TIMEOUT'],
+                    batch_size=current_app.config['BREVO_BATCH_SIZE'],
+                    max_requests_per_second=current_app.config['BREVO_MAX_REQUESTS_PER_SECOND'],
+                    on_request=observe_brevo_request
+                )
+    return extensions['brevo_client']
+
+def email_sender():
+    return {
+        "name": "Crystal & Yang Wedding",
+        "email": current_app.config['FROM_EMAIL']
+    }
+
+def build_confirmation_email(email, name, guest_names, welcome_lunch, wedding_attendance, accommodation, farewell_lunch):
+    """Validate and render the confirmation email for one party"""
+    if not current_app.config['FROM_EMAIL']:
+        raise ValueError("FROM_EMAIL not configured")
     
-    # Accommodation stats (based on total guest count)
-    accommodation_needed = sum(g.guest_count for g in guests if g.accommodation == 'yes')
+    # Validate email format
+    if not email or '@' not in email:
+        raise ValueError("Invalid email address")
     
-    stats = {
-        'total_primary_contacts': total_primary_contacts,
-        'total_guests': total_guests,
-        'wedding_attending': wedding_attending,
-        'welcome_lunch_attending': welcome_lunch_attending,
-        'farewell_lunch_attending': farewell_lunch_attending,
-        'accommodation_needed': accommodation_needed
+    return {
+        "to": [
+            {
+                "email": email,
+                "name": name
+            }
+        ],
+        "subject": CONFIRMATION_SUBJECT,
+        "htmlContent": render_confirmation_email(current_app.jinja_env, name, guest_names, welcome_lunch,
+                                                 wedding_attendance, accommodation, farewell_lunch)
     }
-    
-    return render_template('admin.html', guests=guests, stats=stats)
 
-def send_confirmation_email(email, name, guest_names, welcome_lunch, wedding_attendance, accommodation, farewell_lunch):
-    """Send confirmation email using Brevo"""
-    try:
-        import requests
-        
-        # Validate email configuration
-        api_key = app_config.BREVO_API_KEY
-        if not api_key:
-            raise ValueError("Brevo API key not configured")
-        
-        if not app_config.FROM_EMAIL:
-            raise ValueError("FROM_EMAIL not configured")
-        
-        # Validate email format
-        if not email or '@' not in email:
-            raise ValueError("Invalid email address")
-        
-        # Format guest names
-        guest_names_text = ", ".join(guest_names) if len(guest_names) > 1 else guest_names[0]
-        
-        # Email content
-        subject = "Crystal & Yang's Wedding - RSVP Confirmation"
-        html_content = f"""
-<table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#faf7f2;padding:32px 0;">
-  <tr>
-    <td align="center">
-      <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="600" style="max-width:600px;background:#ffffff;border-radius:14px;border:1px solid #e9e4da;box-shadow:0 1px 6px rgba(0,0,0,0.04);">
-        <tr>
-          <td style="padding:32px 36px 16px 36px;border-bottom:1px solid #efeae0;">
-            <div style="font-family: 'Didot', 'Bodoni MT', Georgia, 'Times New Roman', serif; font-size:28px; line-height:1.2; color:#2b2b2b; text-align:center; letter-spacing:0.5px;">
-              Crystal &amp; Yang
-            </div>
-            <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; letter-spacing:2px; text-transform:uppercase; color:#8a7e6a; text-align:center; margin-top:6px;">
-              Wedding RSVP Confirmation
-            </div>
-          </td>
-        </tr>
-
-        <tr>
-          <td style="padding:24px 36px 0 36px;">
-            <p style="margin:0 0 10px 0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
-              Dear <strong>{name}</strong>,
-            </p>
-            <p style="margin:0 0 18px 0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
-              Thank you for your RSVP — we can’t wait to celebrate together!
-            </p>
-          </td>
-        </tr>
-
-        <tr>
-          <td style="padding:0 36px 0 36px;">
-            <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#f9f7f3;border:1px solid #efeae0;border-radius:10px;">
-              <tr>
-                <td style="padding:16px 18px;">
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
-                    Your RSVP Details
-                  </div>
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
-                    <div><strong>Guests</strong>: {guest_names_text}</div>
-                    <div><strong>Welcome Lunch (May 10)</strong>: {welcome_lunch.replace('_', ' ').title()}</div>
-                    <div><strong>Wedding Day (May 12)</strong>: {wedding_attendance.replace('_', ' ').title()}</div>
-                    <div><strong>Accommodation</strong>: {accommodation.title()}</div>
-                    <div><strong>Farewell Lunch (May 13)</strong>: {farewell_lunch.replace('_', ' ').title()}</div>
-                  </div>
-                </td>
-              </tr>
-            </table>
-          </td>
-        </tr>
-
-        <tr>
-          <td style="padding:22px 36px 0 36px;">
-            <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="border-collapse:separate;">
-              <tr>
-                <td style="vertical-align:top; padding:0 0 16px 0;">
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
-                    Arrival & Check-In
-                  </div>
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
-                    Please arrive <em>camera-ready</em> (dressed up & make-up done). Check-in opens from <strong>2:00 PM</strong>, then join us for a welcome toast at <strong>2:30 PM</strong>.
-                  </div>
-                </td>
-              </tr>
-              <tr>
-                <td style="vertical-align:top; padding:0 0 16px 0;">
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
-                    Dress Code
-                  </div>
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
-                    Black tie for men; pastel long dresses for daytime for women (no white/cream) + optional darker looks in the evening.
-                  </div>
-                </td>
-              </tr>
-              <tr>
-                <td style="vertical-align:top; padding:0 0 6px 0;">
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
-                    Venue
-                  </div>
-                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
-                    Hedsor House, Buckinghamshire.  
-                    For full details &amp; travel tips, please visit our
-                    <a href="https://crystal-yang-wedding.up.railway.app" target="_blank" style="color:#b8a16a; text-decoration:none; font-weight:bold;">
-                      wedding website
-                    </a>.
-                  </div>
-                </td>
-              </tr>
-            </table>
-          </td>
-        </tr>
-
-        <tr>
-          <td style="padding:22px 36px 28px 36px;">
-            <div style="height:1px;background:#efeae0;margin:10px 0 18px 0;"></div>
-            <p style="margin:0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
-              If anything changes, just 
-              <a href="https://wa.me/14415244044" target="_blank" style="color:#b8a16a; font-weight:bold; text-decoration:none;">
-                WhatsApp us
-              </a> — do not reply to this email!
-            </p>
-          </td>
-        </tr>
-
-        <tr>
-          <td style="padding:0 36px 30px 36px; text-align:center;">
-            <div style="font-family: Arial, Helvetica, sans-serif; color:#8a7e6a; font-size:13px;">With love,</div>
-            <div style="font-family: 'Didot','Bodoni MT',Georgia,'Times New Roman',serif; font-size:18px; color:#2b2b2b; margin-top:2px;">
-              Crystal &amp; Yang
-            </div>
-            <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; margin-top:4px;">
-              Hedsor House — May 12, 2026
-            </div>
-            <div style="margin-top:10px;">
-              <a href="https://crystal-yang-wedding.up.railway.app" target="_blank" style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#b8a16a; text-decoration:none;">
-                Visit our wedding website ↗
-              </a>
-            </div>
-          </td>
-        </tr>
-      </table>
-    </td>
-  </tr>
-</table>
-"""
+# Email outbox dispatcher
+OUTBOX_BUILDERS = {
+    'rsvp_confirmation': build_confirmation_email
+}
 
+def _outbox_backoff(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(current_app.config['OUTBOX_BACKOFF_BASE'] * 2 ** (attempts - 1), current_app.config['OUTBOX_BACKOFF_MAX'])
+    return timedelta(seconds=delay + random.uniform(0, current_app.config['OUTBOX_BACKOFF_BASE']))
 
-        
-        # Send email using Brevo API
-        url = "https://api.brevo.com/v3/smtp/email"
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "api-key": api_key
-        }
-        
-        payload = {
-            "sender": {
-                "name": "Crystal & Yang Wedding",
-                "email": app_config.FROM_EMAIL
-            },
-            "to": [
-                {
-                    "email": email,
-                    "name": name
-                }
-            ],
-            "subject": subject,
-            "htmlContent": html_content
-        }
-        
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 201:
-            print(f"Email sent successfully to {email}")
-            return response.json()
+def claim_outbox_batch(limit):
+    """Lease up to `limit` due messages so no other dispatcher picks them up.
+
+    Messages left in 'sending' by a crashed dispatcher become due again once
+    their lease expires.
+    """
+    now = datetime.utcnow()
+    candidate_ids = [row.id for row in db.session.query(EmailOutbox.id).filter(
+        EmailOutbox.status.in_(['pending', 'sending']),
+        EmailOutbox.next_attempt_at <= now
+    ).order_by(EmailOutbox.next_attempt_at).limit(limit)]
+
+    lease_until = now + timedelta(seconds=current_app.config['OUTBOX_LEASE_SECONDS'])
+    claimed_ids = []
+    for message_id in candidate_ids:
+        result = db.session.execute(
+            db.update(EmailOutbox)
+            .where(
+                EmailOutbox.id == message_id,
+                EmailOutbox.status.in_(['pending', 'sending']),
+                EmailOutbox.next_attempt_at <= now
+            )
+            .values(status='sending', next_attempt_at=lease_until)
+        )
+        if result.rowcount == 1:
+            claimed_ids.append(message_id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id).all()
+
+def _record_outbox_failure(message, error, permanent=False):
+    message.last_error = str(error)
+    if permanent or message.attempts >= current_app.config['OUTBOX_MAX_ATTEMPTS']:
+        message.status = 'failed'
+        logger.error('Outbox message failed permanently',
+                     extra={'message_id': message.id, 'recipient': message.recipient, 'error': str(error)})
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = datetime.utcnow() + _outbox_backoff(message.attempts)
+        logger.warning('Outbox message will be retried', extra={
+            'message_id': message.id, 'recipient': message.recipient, 'attempts': message.attempts, 'error': str(error)
+        })
+
+def dispatch_outbox(limit=None):
+    """Deliver one batch of due outbox messages. Returns the number processed.
+
+    Messages are rendered individually and then sent through the Brevo client
+    in multi-recipient batches. A rate-limited batch is rescheduled, together
+    with everything after it, without counting as a failed attempt. Messages
+    wait while no Brevo API key is configured, and the client (with
+    `requests`) is only created once there is something to send.
+    """
+    if not current_app.config['BREVO_API_KEY']:
+        return 0
+    messages = claim_outbox_batch(limit or current_app.config['OUTBOX_BATCH_SIZE'])
+    ready = []
+    for message in messages:
+        message.attempts += 1
+        try:
+            ready.append((message, OUTBOX_BUILDERS[message.kind](**json.loads(message.payload))))
+        except (KeyError, ValueError) as e:
+            _record_outbox_failure(message, e, permanent=True)
+    if not ready:
+        db.session.commit()
+        return len(messages)
+    
+    client = get_brevo_client()
+    for start in range(0, len(ready), client.batch_size):
+        chunk = ready[start:start + client.batch_size]
+        try:
+            client.send_batch(email_sender(), [email for _, email in chunk])
+        except BrevoRateLimited as e:
+            retry_at = datetime.utcnow() + timedelta(seconds=e.retry_after)
+            for message, _ in ready[start:]:
+                message.attempts -= 1
+                message.status = 'pending'
+                message.next_attempt_at = retry_at
+                message.last_error = str(e)
+            logger.warning('Brevo rate limit reached, rescheduling messages',
+                           extra={'messages': len(ready) - start, 'retry_after': e.retry_after})
+            break
+        except Exception as e:
+            for message, _ in chunk:
+                _record_outbox_failure(message, e)
         else:
-            raise Exception(f"Brevo API error: {response.status_code} - {response.text}")
-        
-    except Exception as e:
-        print(f"Error sending email to {email}: {e}")
-        raise e
+            sent_at = datetime.utcnow()
+            for message, _ in chunk:
+                message.status = 'sent'
+                message.sent_at = sent_at
+                message.last_error = None
+    db.session.commit()
+    return len(messages)
+
+def dispatch_reminders():
+    """Send the next batch of the due reminder campaign within the per-minute budget.
+
+    Returns the number of deliveries processed. Campaigns wait while no Brevo
+    API key is configured, and the client is not created while none is due.
+    """
+    if not current_app.config['BREVO_API_KEY'] or due_campaign() is None:
+        return 0
+    outcomes = dispatch_reminder_batch(get_brevo_client(), email_sender(), current_app.jinja_env,
+                                       per_minute=current_app.config['REMINDER_SENDS_PER_MINUTE'],
+                                       batch_size=current_app.config['REMINDER_BATCH_SIZE'],
+                                       lease_seconds=current_app.config['OUTBOX_LEASE_SECONDS'])
+    for outcome, count in outcomes.items():
+        REMINDERS.inc(count, outcome=outcome)
+    if outcomes:
+        logger.info('Reminder batch dispatched', extra=dict(outcomes))
+    return sum(count for outcome, count in outcomes.items() if outcome != 'rate_limited')
+
+def run_outbox_worker(app, stop_event=None, once=False):
+    """Drain the outbox and due reminder campaigns until `stop_event` is set, sleeping when idle"""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                processed = dispatch_outbox() + dispatch_reminders()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Outbox dispatch failed')
+                processed = 0
+        if once:
+            return
+        if not processed:
+            stop_event.wait(app.config['OUTBOX_POLL_INTERVAL'])
+
+@main.before_app_request
+def start_outbox_thread():
+    """Start the in-process dispatcher on the first request a worker serves"""
+    extensions = current_app.extensions
+    if extensions['outbox_thread'] is not None or not current_app.config['OUTBOX_WORKER_THREAD']:
+        return
+    with extensions['outbox_thread_lock']:
+        if extensions['outbox_thread'] is None:
+            extensions['outbox_thread'] = threading.Thread(
+                target=run_outbox_worker, args=(current_app._get_current_object(),),
+                name='outbox-dispatcher', daemon=True
+            )
+            extensions['outbox_thread'].start()
+
+@main.cli.command('outbox-worker')
+@click.option('--once', is_flag=True, help='Process a single batch and exit.')
+def outbox_worker_command(once):
+    """Run the email outbox dispatcher as a standalone process"""
+    run_outbox_worker(current_app._get_current_object(), once=once)
+
+@main.cli.command('build-images')
+def build_images_command():
+    """Pre-generate every image variant so no visitor waits for an encode"""
+    sources = [SCHEDULE_IMAGE] + [os.path.join(IMAGES_FOLDER, name) for name in sorted(os.listdir(IMAGES_FOLDER))]
+    for path in sources:
+        if os.path.isfile(path):
+            variants = build_all_variants(path, current_app.config['IMAGE_CACHE_DIR'])
+            click.echo(f'{os.path.basename(path)}: {len(variants)} variants')
+
+@main.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress everything under static/"""
+    manifest = build_manifest(current_app.static_folder)
+    click.echo(f'Wrote static/manifest.json with {len(manifest)} assets')
+
+@main.cli.command('check-assets')
+def check_assets_command():
+    """Fail when static/manifest.json is out of date"""
+    problems = stale_entries(current_app.static_folder)
+    for problem in problems:
+        click.echo(problem)
+    if problems:
+        click.echo("Static manifest is stale; run 'flask --app app build-assets'.")
+        raise SystemExit(1)
+    click.echo('Static manifest is up to date.')
+
+@main.cli.command('stats-check')
+@click.option('--repair', is_flag=True, help='Rebuild the statistics row if it has drifted.')
+def stats_check_command(repair):
+    """Compare the maintained RSVP statistics and room demand with a full recomputation"""
+    row = db.session.get(RsvpStats, 1)
+    stored = row.to_dict() if row else {}
+    actual = compute_rsvp_stats()
+    drift = {field: (stored.get(field), value) for field, value in actual.items() if stored.get(field) != value}
+    stored_demand = get_room_demand()
+    actual_demand = compute_room_demand()
+    drift.update({f'room_demand[{size}]': (stored_demand.get(size, 0), actual_demand.get(size, 0))
+                  for size in sorted(set(stored_demand) | set(actual_demand))
+                  if stored_demand.get(size, 0) != actual_demand.get(size, 0)})
+    if not drift:
+        click.echo('RSVP statistics are consistent.')
+        return
+    for field, (stored_value, actual_value) in drift.items():
+        click.echo(f'{field}: stored={stored_value} actual={actual_value}')
+    if repair:
+        rebuild_rsvp_stats()
+        click.echo('RSVP statistics rebuilt.')
+    else:
+        raise SystemExit(1)
+
+@main.cli.command('import-invitations')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+def import_invitations_command(path, fmt):
+    """Add the parties in a CSV or JSONL invite list to the invitations"""
+    with open(path, 'rb') as f:
+        report = import_invitations(read_records(f, fmt or detect_format(path)))
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}")
+    click.echo(f"{report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s): "
+               f"{report['imported']} imported, {report['already_invited']} already invited, "
+               f"{report['duplicates']} duplicates, {report['invalid']} invalid")
+
+@main.cli.command('schedule-reminders')
+@click.option('--audience', type=click.Choice(REMINDER_AUDIENCES), default='all', show_default=True,
+              help="'no_reply': no RSVP yet; 'partial': RSVP for fewer seats than invited; 'all': both.")
+@click.option('--at', 'scheduled_at', type=click.DateTime(['%Y-%m-%d', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M']),
+              help='UTC time to start sending, e.g. "2026-04-01 09:00"; defaults to now.')
+def schedule_reminders_command(audience, scheduled_at):
+    """Schedule a reminder email to invitations still missing an RSVP"""
+    campaign, recipients = create_campaign(audience, scheduled_at)
+    click.echo(f'Campaign {campaign.id}: {recipients} recipients from {campaign.scheduled_at:%Y-%m-%d %H:%M} UTC')
+
+@main.cli.command('send-reminders')
+@click.option('--retry-failed', 'retry_campaign', type=int, metavar='CAMPAIGN',
+              help='First queue the failed deliveries of this campaign again.')
+def send_reminders_command(retry_campaign):
+    """Send due reminder campaigns now, waiting out the per-minute budget"""
+    if not current_app.config['BREVO_API_KEY']:
+        raise click.ClickException(BREVO_DISABLED_WARNING)
+    if retry_campaign is not None:
+        click.echo(f'Queued {retry_failed(retry_campaign)} failed deliveries again')
+    sent = 0
+    while True:
+        processed = dispatch_reminders()
+        sent += processed
+        if not processed:
+            if due_campaign() is None:
+                break
+            time.sleep(1)
+    click.echo(f'Processed {sent} reminder deliveries')
 
-# Create database tables
-with app.app_context():
-    db.create_all()
+@main.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables, columns and indexes and migrate older data"""
+    upgrade_schema()
+    click.echo('Database schema is up to date.')
 
 if __name__ == '__main__':
+    app = create_app()
+    if not app.config['BREVO_API_KEY']:
+        logger.warning(BREVO_DISABLED_WARNING)
+    with app.app_context():
+        upgrade_schema()
     app.run(debug=True)
@@ -0,0 +1,129 @@
+"""
+Fingerprinted static assets.
+
+`flask --app app build-assets` hashes every file under static/ and writes
+static/manifest.json, mapping each file to a name that carries its content
+hash (css/style.css -> css/style.1a2b3c4d5e6f.css). Text assets are also
+precompressed to gzip and, when the brotli package is installed, brotli,
+under static/dist/. Hashed URLs never change content, so they are served
+with far-future immutable caching. `flask --app app check-assets` exits
+non-zero when the manifest no longer matches the files on disk.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+PRECOMPRESSED_DIR = 'dist'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+
+# Content-Encoding -> file suffix, most preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')] if brotli else [('gzip', '.gz')]
+
+
+def _digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()[:12]
+
+
+def hashed_name(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}"
+
+
+def is_compressible(filename):
+    return filename.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def source_files(static_folder):
+    """Static files to fingerprint, as '/'-separated paths relative to static/"""
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        relative_dir = os.path.relpath(dirpath, static_folder)
+        if relative_dir == PRECOMPRESSED_DIR or relative_dir.startswith(PRECOMPRESSED_DIR + os.sep):
+            continue
+        for name in filenames:
+            filename = os.path.normpath(os.path.join(relative_dir, name)).replace(os.sep, '/')
+            if filename != MANIFEST_NAME:
+                yield filename
+
+
+def compute_manifest(static_folder):
+    return {filename: hashed_name(filename, _digest(os.path.join(static_folder, filename)))
+            for filename in sorted(source_files(static_folder))}
+
+
+def precompressed_path(static_folder, hashed, suffix):
+    return os.path.join(static_folder, PRECOMPRESSED_DIR, *hashed.split('/')) + suffix
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_manifest(static_folder):
+    """Write the manifest and precompressed variants; stale variants are removed"""
+    manifest = compute_manifest(static_folder)
+    wanted = set()
+    for filename, hashed in manifest.items():
+        if not is_compressible(filename):
+            continue
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            data = f.read()
+        for encoding, suffix in ENCODINGS:
+            path = precompressed_path(static_folder, hashed, suffix)
+            wanted.add(path)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(_compress(data, encoding))
+
+    dist = os.path.join(static_folder, PRECOMPRESSED_DIR)
+    for dirpath, _, filenames in os.walk(dist):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if path not in wanted:
+                os.remove(path)
+
+    with open(os.path.join(static_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def stale_entries(static_folder):
+    """Describe every way the committed manifest differs from the files on disk"""
+    problems = []
+    manifest = load_manifest(static_folder)
+    actual = compute_manifest(static_folder)
+    for filename in sorted(set(manifest) | set(actual)):
+        if filename not in actual:
+            problems.append(f'{filename}: in manifest but missing from static/')
+        elif filename not in manifest:
+            problems.append(f'{filename}: not in manifest')
+        elif manifest[filename] != actual[filename]:
+            problems.append(f'{filename}: content changed ({manifest[filename]} -> {actual[filename]})')
+        elif is_compressible(filename):
+            for _, suffix in ENCODINGS:
+                if not os.path.exists(precompressed_path(static_folder, actual[filename], suffix)):
+                    problems.append(f'{filename}: missing precompressed {suffix} variant')
+    return problems
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Brevo send throughput benchmark against the local fake server.
+
+Sends the same N confirmation messages three ways and reports throughput:
+a fresh connection per message (the original requests.post call), one
+message per request over the pooled session, and messageVersions batches
+over the pooled session.
+
+Usage: python benchmarks/bench_brevo_batch.py [--messages 500] [--latency 0.02] [--batch-size 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from brevo import BrevoClient
+from fake_brevo import start_fake_brevo
+
+SENDER = {'name': 'Crystal & Yang Wedding', 'email': 'noreply@example.com'}
+
+
+def make_messages(count):
+    return [{
+        'to': [{'email': f'guest{i}@example.com', 'name': f'Guest {i}'}],
+        'subject': "Crystal & Yang's Wedding - RSVP Confirmation",
+        'htmlContent': f'<p>Dear Guest {i}, thank you for your RSVP.</p>' + ' ' * 4000
+    } for i in range(count)]
+
+
+def send_unpooled(server, messages):
+    for message in messages:
+        response = requests.post(server.url + '/smtp/email', json={'sender': SENDER, **message},
+                                 headers={'api-key': 'bench'}, timeout=10)
+        assert response.status_code == 201, response.status_code
+
+
+def send_pooled(server, messages):
+    client = BrevoClient('bench', base_url=server.url)
+    for message in messages:
+        client.send(SENDER, message)
+    client.close()
+
+
+def send_batched(server, messages, batch_size):
+    client = BrevoClient('bench', base_url=server.url, batch_size=batch_size)
+    client.send_batch(SENDER, messages)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated Brevo response time in seconds')
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+
+    server = start_fake_brevo(latency=args.latency)
+    messages = make_messages(args.messages)
+    modes = {
+        'fresh connection': lambda: send_unpooled(server, messages),
+        'pooled session': lambda: send_pooled(server, messages),
+        'batched': lambda: send_batched(server, messages, args.batch_size)
+    }
+
+    print(f"{'mode':<17} {'requests':>8} {'seconds':>8} {'msgs/s':>8}")
+    for label, run in modes.items():
+        server.reset()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        stats = server.stats()
+        assert stats['messages'] == args.messages, stats
+        print(f"{label:<17} {stats['requests']:>8} {elapsed:>8.3f} {args.messages / elapsed:>8.0f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Confirmation email rendering micro-benchmark.
+
+Renders the RSVP confirmation email N times three ways: with the original
+inline f-string that send_confirmation_email used to build, with a full
+Jinja render of the templates, and with emails.py, which fills escaped
+values into the pre-rendered templates. Checks that all three produce the
+same markup, and that emails.py escapes a name with markup in it the way
+Jinja does, then prints the per-email cost of each. The f-string does no
+escaping, so it is the floor rather than a target.
+
+Usage: python benchmarks/bench_email_render.py [--count 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from emails import CONFIRMATION_DETAILS_TEMPLATE, CONFIRMATION_TEMPLATE, render_confirmation_email, response_label
+
+SAMPLE = {
+    'name': 'Ada Lovelace',
+    'guest_names': ['Ada Lovelace', 'Charles Babbage'],
+    'welcome_lunch': 'attending',
+    'wedding_attendance': 'attending',
+    'accommodation': 'yes',
+    'farewell_lunch': 'not_attending'
+}
+
+
+def legacy_render(name, guest_names, welcome_lunch, wedding_attendance, accommodation, farewell_lunch):
+    """The confirmation markup as send_confirmation_email built it before the template"""
+    guest_names_text = ", ".join(guest_names) if len(guest_names) > 1 else guest_names[0]
+    return f"""
+<table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#faf7f2;padding:32px 0;">
+  <tr>
+    <td align="center">
+      <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="600" style="max-width:600px;background:#ffffff;border-radius:14px;border:1px solid #e9e4da;box-shadow:0 1px 6px rgba(0,0,0,0.04);">
+        <tr>
+          <td style="padding:32px 36px 16px 36px;border-bottom:1px solid #efeae0;">
+            <div style="font-family: 'Didot', 'Bodoni MT', Georgia, 'Times New Roman', serif; font-size:28px; line-height:1.2; color:#2b2b2b; text-align:center; letter-spacing:0.5px;">
+              Crystal &amp; Yang
+            </div>
+            <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; letter-spacing:2px; text-transform:uppercase; color:#8a7e6a; text-align:center; margin-top:6px;">
+              Wedding RSVP Confirmation
+            </div>
+          </td>
+        </tr>
+
+        <tr>
+          <td style="padding:24px 36px 0 36px;">
+            <p style="margin:0 0 10px 0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
+              Dear <strong>{name}</strong>,
+            </p>
+            <p style="margin:0 0 18px 0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
+              Thank you for your RSVP — we can’t wait to celebrate together!
+            </p>
+          </td>
+        </tr>
+
+        <tr>
+          <td style="padding:0 36px 0 36px;">
+            <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#f9f7f3;border:1px solid #efeae0;border-radius:10px;">
+              <tr>
+                <td style="padding:16px 18px;">
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
+                    Your RSVP Details
+                  </div>
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
+                    <div><strong>Guests</strong>: {guest_names_text}</div>
+                    <div><strong>Welcome Lunch (May 10)</strong>: {welcome_lunch.replace('_', ' ').title()}</div>
+                    <div><strong>Wedding Day (May 12)</strong>: {wedding_attendance.replace('_', ' ').title()}</div>
+                    <div><strong>Accommodation</strong>: {accommodation.title()}</div>
+                    <div><strong>Farewell Lunch (May 13)</strong>: {farewell_lunch.replace('_', ' ').title()}</div>
+                  </div>
+                </td>
+              </tr>
+            </table>
+          </td>
+        </tr>
+
+        <tr>
+          <td style="padding:22px 36px 0 36px;">
+            <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="border-collapse:separate;">
+              <tr>
+                <td style="vertical-align:top; padding:0 0 16px 0;">
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
+                    Arrival & Check-In
+                  </div>
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
+                    Please arrive <em>camera-ready</em> (dressed up & make-up done). Check-in opens from <strong>2:00 PM</strong>, then join us for a welcome toast at <strong>2:30 PM</strong>.
+                  </div>
+                </td>
+              </tr>
+              <tr>
+                <td style="vertical-align:top; padding:0 0 16px 0;">
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
+                    Dress Code
+                  </div>
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
+                    Black tie for men; pastel long dresses for daytime for women (no white/cream) + optional darker looks in the evening.
+                  </div>
+                </td>
+              </tr>
+              <tr>
+                <td style="vertical-align:top; padding:0 0 6px 0;">
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; letter-spacing:1.5px; text-transform:uppercase; margin-bottom:6px;">
+                    Venue
+                  </div>
+                  <div style="font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b; line-height:1.6;">
+                    Hedsor House, Buckinghamshire.  
+                    For full details &amp; travel tips, please visit our
+                    <a href="https://crystal-yang-wedding.up.railway.app" target="_blank" style="color:#b8a16a; text-decoration:none; font-weight:bold;">
+                      wedding website
+                    </a>.
+                  </div>
+                </td>
+              </tr>
+            </table>
+          </td>
+        </tr>
+
+        <tr>
+          <td style="padding:22px 36px 28px 36px;">
+            <div style="height:1px;background:#efeae0;margin:10px 0 18px 0;"></div>
+            <p style="margin:0; font-family: Arial, Helvetica, sans-serif; font-size:16px; color:#2b2b2b;">
+              If anything changes, just 
+              <a href="https://wa.me/14415244044" target="_blank" style="color:#b8a16a; font-weight:bold; text-decoration:none;">
+                WhatsApp us
+              </a> — do not reply to this email!
+            </p>
+          </td>
+        </tr>
+
+        <tr>
+          <td style="padding:0 36px 30px 36px; text-align:center;">
+            <div style="font-family: Arial, Helvetica, sans-serif; color:#8a7e6a; font-size:13px;">With love,</div>
+            <div style="font-family: 'Didot','Bodoni MT',Georgia,'Times New Roman',serif; font-size:18px; color:#2b2b2b; margin-top:2px;">
+              Crystal &amp; Yang
+            </div>
+            <div style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#8a7e6a; margin-top:4px;">
+              Hedsor House — May 12, 2026
+            </div>
+            <div style="margin-top:10px;">
+              <a href="https://crystal-yang-wedding.up.railway.app" target="_blank" style="font-family: Arial, Helvetica, sans-serif; font-size:12px; color:#b8a16a; text-decoration:none;">
+                Visit our wedding website ↗
+              </a>
+            </div>
+          </td>
+        </tr>
+      </table>
+    </td>
+  </tr>
+</table>
+"""
+
+
+def time_renders(render, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        render(**SAMPLE)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args()
+
+    jinja_env = Environment(
+        loader=FileSystemLoader(os.path.join(ROOT, 'templates')),
+        autoescape=select_autoescape(['html'])
+    )
+
+    def jinja_render(name, guest_names, welcome_lunch, wedding_attendance, accommodation, farewell_lunch):
+        details = jinja_env.get_template(CONFIRMATION_DETAILS_TEMPLATE).render(
+            name=name,
+            guest_names_text=", ".join(guest_names) if guest_names else name,
+            welcome_lunch=response_label(welcome_lunch),
+            wedding_attendance=response_label(wedding_attendance),
+            accommodation=response_label(accommodation),
+            farewell_lunch=response_label(farewell_lunch)
+        )
+        return jinja_env.get_template(CONFIRMATION_TEMPLATE).render(details=Markup(details))
+
+    def prerendered(**kwargs):
+        return render_confirmation_email(jinja_env, **kwargs)
+
+    if prerendered(**SAMPLE).split() != legacy_render(**SAMPLE).split():
+        sys.exit('Rendered markup differs from the legacy f-string output')
+    hostile = {**SAMPLE, 'name': '<b>Ada & "Bo"</b>', 'guest_names': ["O'Neil <script>"]}
+    if prerendered(**hostile) != jinja_render(**hostile):
+        sys.exit('Escaped markup differs from a full Jinja render')
+
+    results = {
+        'legacy f-string': time_renders(legacy_render, args.count),
+        'jinja render': time_renders(jinja_render, args.count),
+        'pre-rendered': time_renders(prerendered, args.count)
+    }
+    print(f"{'renderer':<16} {'total s':>8} {'us/email':>9}")
+    for label, elapsed in results.items():
+        print(f"{label:<16} {elapsed:>8.3f} {elapsed / args.count * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
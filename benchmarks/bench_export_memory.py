@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Export memory benchmark.
+
+Seeds a temporary database with an increasing number of parties and streams
+/admin/export through the test client at each size, discarding the chunks as
+they arrive. Python heap peaks are measured with tracemalloc. The export
+reads rows with yield_per, so the peak should stay flat from 10k to 100k
+parties. The script exits non-zero if the largest run peaks at more than
+--max-growth times the smallest.
+
+Usage: python benchmarks/bench_export_memory.py [--sizes 10000,100000] [--format csv] [--max-growth 1.5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_parties(app, start, count, chunk_size=5000):
+    """Insert parties of two with their members using batched statements"""
+    from models import Guest, GuestMember, db
+    with app.app_context():
+        for offset in range(start, start + count, chunk_size):
+            ids = range(offset + 1, min(offset + chunk_size, start + count) + 1)
+            db.session.execute(db.insert(Guest), [{
+                'id': i,
+                'name': f'Guest {i}',
+                'email': f'guest{i}@example.com',
+                'email_normalized': f'guest{i}@example.com',
+                'guest_count': 2,
+                'message': 'Looking forward to it!',
+                'created_at': datetime.utcnow(),
+                'welcome_lunch': 'attending',
+                'wedding_attendance': 'attending',
+                'accommodation': 'yes' if i % 2 else 'no',
+                'farewell_lunch': 'not_attending'
+            } for i in ids])
+            db.session.execute(db.insert(GuestMember), [
+                {'guest_id': i, 'position': position, 'name': name, 'name_normalized': name.lower()}
+                for i in ids for position, name in enumerate((f'Guest {i}', f'Partner {i}'))
+            ])
+        db.session.commit()
+
+
+def measure_export(client, export_format):
+    """Stream one export and return (bytes, seconds, peak heap bytes)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    response = client.get(f'/admin/export?format={export_format}', buffered=False)
+    total = 0
+    for chunk in response.response:
+        total += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--format', default='csv', choices=['csv', 'xlsx'])
+    parser.add_argument('--max-growth', type=float, default=1.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ['OUTBOX_WORKER_THREAD'] = 'false'
+    os.environ['FLASK_ENV'] = 'production'
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from migrations import upgrade_schema
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    print(f"{'parties':>8} {'rows':>8} {'MB out':>8} {'seconds':>8} {'peak MB':>8}")
+    peaks = []
+    seeded = 0
+    for size in sorted(int(s) for s in args.sizes.split(',')):
+        seed_parties(app, seeded, size - seeded)
+        seeded = size
+        total, elapsed, peak = measure_export(client, args.format)
+        peaks.append(peak)
+        print(f"{size:>8} {size * 2:>8} {total / 1e6:>8.1f} {elapsed:>8.2f} {peak / 1e6:>8.2f}")
+
+    if peaks[-1] > peaks[0] * args.max_growth:
+        sys.exit(f"Peak memory grew {peaks[-1] / peaks[0]:.2f}x from the smallest to the largest export")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Landing page latency benchmark.
+
+Seeds a temporary database with a growing number of guests and measures the
+latency of GET / at each size. The landing page no longer reads the Guest
+table, so latency should stay flat as the guest count grows.
+
+Usage: python benchmarks/bench_home.py [--sizes 0,1000,10000,50000] [--requests 500]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_guests(app, count):
+    """Insert `count` synthetic guests in one batched statement"""
+    rows = [{
+        'name': f'Guest {i}',
+        'email': f'guest{i}@example.com',
+        'guest_count': 2,
+        'guest_names': '["Guest", "Partner"]',
+        'message': '',
+        'created_at': datetime.utcnow(),
+        'welcome_lunch': 'attending',
+        'wedding_attendance': 'attending',
+        'accommodation': 'yes' if i % 2 else 'no',
+        'farewell_lunch': 'not_attending'
+    } for i in range(count)]
+    if rows:
+        from models import Guest, db
+        with app.app_context():
+            db.session.execute(db.insert(Guest), rows)
+            db.session.commit()
+
+
+def measure(client, path, requests_count, headers=None):
+    """Return per-request latencies in milliseconds"""
+    latencies = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers or {})
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code in (200, 304), response.status_code
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='0,1000,10000,50000')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ['OUTBOX_WORKER_THREAD'] = 'false'
+    os.environ['FLASK_ENV'] = 'production'
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from migrations import upgrade_schema
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    etag = client.get('/').headers['ETag']
+
+    print(f"{'guests':>8} {'p50 ms':>8} {'p99 ms':>8} {'304 p50 ms':>11}")
+    seeded = 0
+    for size in sorted(int(s) for s in args.sizes.split(',')):
+        seed_guests(app, size - seeded)
+        seeded = size
+        full = sorted(measure(client, '/', args.requests))
+        conditional = measure(client, '/', args.requests, headers={'If-None-Match': etag})
+        p99 = full[min(len(full) - 1, int(len(full) * 0.99))]
+        print(f"{size:>8} {statistics.median(full):>8.3f} {p99:>8.3f} {statistics.median(conditional):>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Invite list import benchmark.
+
+Writes a synthetic invite list of --rows records as CSV and as JSONL, with
+a share of invalid and duplicate rows. It imports each format into a fresh
+temporary database with invitations.import_invitations and reports rows
+per second, then imports the same file again, when every row is already
+invited. For scale, it also times --baseline-rows invitations added one ORM
+object and one commit at a time. Exits non-zero when the import's counts do
+not match what was written.
+
+Usage: python benchmarks/bench_invite_import.py [--rows 100000] [--chunk-size 1000] [--baseline-rows 2000]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_invite_lists(directory, rows, invalid_rate, duplicate_rate):
+    """Write the same records as invites.csv and invites.jsonl; returns the expected counts"""
+    rng = random.Random(2026)
+    expected = {'rows': rows, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+    records = []
+    imported = []
+    for i in range(rows):
+        roll = rng.random()
+        if roll < invalid_rate:
+            records.append({'name': f'Guest {i}', 'email': f'guest{i}.example.com', 'party_size': 2})
+            expected['invalid'] += 1
+        elif roll < invalid_rate + duplicate_rate and imported:
+            # Same address as an earlier row, differing only in case and whitespace
+            records.append({'name': f'Guest {i}', 'email': f'GUEST{rng.choice(imported)}@example.com ', 'party_size': 1})
+            expected['duplicates'] += 1
+        else:
+            records.append({'name': f'Guest {i}', 'email': f'guest{i}@example.com', 'party_size': rng.randint(1, 5)})
+            imported.append(i)
+            expected['imported'] += 1
+
+    with open(os.path.join(directory, 'invites.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=('name', 'email', 'party_size'))
+        writer.writeheader()
+        writer.writerows(records)
+    with open(os.path.join(directory, 'invites.jsonl'), 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Records in the invite list')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per executemany INSERT')
+    parser.add_argument('--invalid-rate', type=float, default=0.01)
+    parser.add_argument('--duplicate-rate', type=float, default=0.01)
+    parser.add_argument('--baseline-rows', type=int, default=2000, help='Rows to insert one commit at a time')
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'LOG_LEVEL': 'WARNING'
+    })
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from invitations import import_invitations, read_records
+    from migrations import upgrade_schema
+    from models import Invitation, db
+
+    expected = write_invite_lists(tmpdir, args.rows, args.invalid_rate, args.duplicate_rate)
+    app = create_app()
+    failures = []
+    print(f"{'format':<7} {'run':<8} {'rows':>8} {'imported':>9} {'existing':>9} {'dupes':>6} {'invalid':>8} "
+          f"{'seconds':>8} {'rows/s':>9}")
+    with app.app_context():
+        upgrade_schema()
+        for fmt in ('csv', 'jsonl'):
+            db.session.execute(db.delete(Invitation))
+            db.session.commit()
+            for run in ('fresh', 'reimport'):
+                with open(os.path.join(tmpdir, f'invites.{fmt}'), 'rb') as f:
+                    report = import_invitations(read_records(f, fmt), chunk_size=args.chunk_size)
+                print(f"{fmt:<7} {run:<8} {report['rows']:>8} {report['imported']:>9} {report['already_invited']:>9} "
+                      f"{report['duplicates']:>6} {report['invalid']:>8} {report['seconds']:>8.2f} "
+                      f"{report['rows_per_second']:>9}")
+                imported = expected['imported'] if run == 'fresh' else 0
+                if (report['imported'], report['duplicates'], report['invalid']) != \
+                        (imported, expected['duplicates'], expected['invalid']):
+                    failures.append(f'{fmt} {run}')
+
+        db.session.execute(db.delete(Invitation))
+        db.session.commit()
+        start = time.perf_counter()
+        for i in range(args.baseline_rows):
+            db.session.add(Invitation(name=f'Guest {i}', email=f'guest{i}@example.com',
+                                      email_normalized=f'guest{i}@example.com', party_size=1))
+            db.session.commit()
+        elapsed = time.perf_counter() - start
+        print(f"\nOne ORM add and commit per row: {args.baseline_rows / elapsed:.0f} rows/s "
+              f"({args.baseline_rows} rows in {elapsed:.2f}s)")
+
+    if failures:
+        sys.exit(f"Import counts did not match the generated list: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Capacity planning benchmark.
+
+Seeds a temporary database with a growing number of parties and, at each
+size, times the plan built from the maintained aggregates (statistics row
+and room demand histogram) against the same plan built from a full
+recomputation over the guest table. It then submits and edits one RSVP and
+checks that the maintained plan still equals the recomputed one, so the
+incremental path is exercised at every size.
+
+Usage: python benchmarks/bench_planning.py [--sizes 1000,10000,100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_suite import rsvp_form, seed_guests
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Party counts to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed plans per size')
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'RATE_LIMIT_ENABLED': 'false',
+        'PLANNING_INVITED_GUESTS': str(3 * max(int(s) for s in args.sizes.split(','))),
+        'LOG_LEVEL': 'ERROR'
+    })
+    from app import create_app
+    from migrations import upgrade_schema
+    from models import compute_room_demand, compute_rsvp_stats, get_room_demand, get_rsvp_stats
+    from planning import build_plan
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+
+    def plan(stats, demand):
+        return build_plan(stats, demand, app.extensions['room_types'],
+                          invited_guests=app.config['PLANNING_INVITED_GUESTS'],
+                          catering_buffer=app.config['PLANNING_CATERING_BUFFER'])
+
+    print(f"{'parties':>8} {'maintained ms':>14} {'recomputed ms':>14} {'rsvp ms':>8}  consistent")
+    failures = 0
+    for size in sorted(int(s) for s in args.sizes.split(',')):
+        seed_guests(app, size)
+        with app.app_context():
+            maintained_ms, _ = median_ms(lambda: plan(get_rsvp_stats(), get_room_demand()), args.repeat)
+            recomputed_ms, _ = median_ms(lambda: plan(compute_rsvp_stats(), compute_room_demand()), args.repeat)
+
+        # One new party needing rooms, then the same party resized
+        form = rsvp_form()
+        form['accommodation'] = 'yes'
+        start = time.perf_counter()
+        client.post('/submit_rsvp', data=form)
+        rsvp_ms = (time.perf_counter() - start) * 1000
+        client.post('/submit_rsvp', data=dict(form, guest_count='3', **{'guest_names[]': ['A', 'B', 'C']}))
+
+        with app.app_context():
+            consistent = (plan(get_rsvp_stats(), get_room_demand())
+                          == plan(compute_rsvp_stats(), compute_room_demand()))
+        failures += not consistent
+        print(f"{size:>8} {maintained_ms:>14.3f} {recomputed_ms:>14.3f} {rsvp_ms:>8.2f}  {'yes' if consistent else 'NO'}")
+
+    if failures:
+        sys.exit('The maintained plan drifted from a full recomputation')
+
+
+if __name__ == '__main__':
+    main()
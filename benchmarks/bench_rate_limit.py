@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+RSVP rate limiter benchmark.
+
+First it times a token spend on each bucket backend in ratelimit.py, for
+a single hot key and for a new key on every call. Then it starts gunicorn
+with --workers processes and the shared SQLite buckets, and floods
+/submit_rsvp from --concurrency clients that all claim one IP (through
+X-Forwarded-For) with a fresh email on every post. It reports how many
+submissions got through, and the latency of accepted posts against
+rejected (429) ones.
+
+Exits non-zero in three cases:
+- the workers together accepted more than the IP burst;
+- a rejected post left a guest row behind;
+- a rejected post left a queued confirmation email behind.
+
+Usage: python benchmarks/bench_rate_limit.py [--workers 4] [--concurrency 16] [--requests 500]
+                                             [--burst 10] [--spends 20000]
+"""
+
+import argparse
+import itertools
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from bench_suite import rsvp_form, start_gunicorn, stop_gunicorn, upgrade_db
+from ratelimit import MemoryBuckets, RateLimit, SQLiteBuckets
+
+
+def time_spends(buckets, count, distinct):
+    """Microseconds per spend, on one key or on `count` different keys"""
+    limit = RateLimit(burst=1e9, per_hour=3600)
+    start = time.perf_counter()
+    for i in range(count):
+        buckets.spend(f'ip:{i}' if distinct else 'ip:hot', limit)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def flood(base_url, total, concurrency):
+    """Post `total` RSVPs from one client IP; returns latencies by status code"""
+    url = base_url + '/submit_rsvp'
+    latencies = {}
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def client_loop():
+        with requests.Session() as session:
+            while next(remaining) < total:
+                start = time.perf_counter()
+                status = session.post(url, data=rsvp_form(), headers={'X-Forwarded-For': '203.0.113.7'},
+                                      timeout=30).status_code
+                with lock:
+                    latencies.setdefault(status, []).append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent HTTP clients')
+    parser.add_argument('--requests', type=int, default=500, help='RSVPs to post from the one IP')
+    parser.add_argument('--burst', type=int, default=10, help='RATE_LIMIT_IP_BURST for the flood')
+    parser.add_argument('--spends', type=int, default=20000, help='Token spends per backend micro-benchmark')
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    print(f"{'backend':<8} {'hot key us':>11} {'new keys us':>12}")
+    for name, make in (('memory', lambda: MemoryBuckets(max_keys=args.spends)),
+                       ('sqlite', lambda: SQLiteBuckets(os.path.join(tmpdir, f'{time.time_ns()}.db'),
+                                                        max_keys=args.spends))):
+        hot = time_spends(make(), args.spends, distinct=False)
+        new = time_spends(make(), args.spends, distinct=True)
+        print(f"{name:<8} {hot:>11.2f} {new:>12.2f}")
+
+    database = os.path.join(tmpdir, 'bench.db')
+    env = {
+        'DATABASE_URL': f'sqlite:///{database}',
+        'FLASK_ENV': 'production',
+        'BREVO_API_KEY': 'bench',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'LOG_LEVEL': 'WARNING',
+        'RATE_LIMIT_BACKEND': 'sqlite',
+        'RATE_LIMIT_SQLITE_PATH': os.path.join(tmpdir, 'ratelimit.db'),
+        'RATE_LIMIT_IP_BURST': str(args.burst),
+        'RATE_LIMIT_IP_PER_HOUR': '1'
+    }
+    upgrade_db(env)
+    process, base_url = start_gunicorn(env, args.workers)
+    try:
+        latencies = flood(base_url, args.requests, args.concurrency)
+    finally:
+        stop_gunicorn(process)
+
+    with sqlite3.connect(database) as connection:
+        guests = connection.execute('SELECT count(*) FROM guest').fetchone()[0]
+        emails = connection.execute('SELECT count(*) FROM email_outbox').fetchone()[0]
+    accepted = len(latencies.get(200, []))
+    print(f"\n{args.requests} posts from one IP across {args.workers} workers: {accepted} accepted, "
+          f"{len(latencies.get(429, []))} rate limited, other statuses "
+          f"{ {status: len(values) for status, values in latencies.items() if status not in (200, 429)} }")
+    for status in (200, 429):
+        if latencies.get(status):
+            ordered = sorted(latencies[status])
+            print(f"  {status}: p50 {statistics.median(ordered):.2f} ms, "
+                  f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:.2f} ms")
+    print(f"  guest rows {guests}, queued emails {emails}")
+
+    if accepted > args.burst:
+        sys.exit(f'{accepted} submissions got through a burst of {args.burst}')
+    if guests != accepted or emails != accepted:
+        sys.exit('Rejected submissions reached the database or the email outbox')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Reminder campaign benchmark against the local fake Brevo server.
+
+Seeds a temporary database with --invitations invitations, of which
+--replied have an RSVP and a share of those an RSVP for fewer seats than
+invited, then runs three phases through dispatch_reminders:
+
+- throughput: schedules a campaign to every non- or partial responder,
+  reporting the time to select the audience, and sends it with an unlimited
+  budget;
+- resume: stops a second campaign mid-batch the way a crashed dispatcher
+  would, lets some recipients reply, then resumes it. The interrupted batch
+  must not be resent and the new replies must be skipped; --retry-failed is
+  then used to send the interrupted batch once;
+- budget: sends a third campaign for --budget-seconds with
+  --budget-per-minute and checks that exactly the budget went out.
+
+Exits non-zero when any recipient gets a reminder twice, or a count is off.
+
+Usage: python benchmarks/bench_reminders.py [--invitations 20000] [--replied 12000] [--latency 0.02]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench_suite import seed_guests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_brevo import start_fake_brevo
+
+
+def drain(dispatch, seconds=None):
+    """Call dispatch_reminders until nothing is due, or for `seconds`; returns deliveries processed"""
+    from reminders import due_campaign
+    processed = 0
+    deadline = time.monotonic() + seconds if seconds else None
+    while deadline is None or time.monotonic() < deadline:
+        count = dispatch()
+        processed += count
+        if not count:
+            if deadline is None and due_campaign() is None:
+                break
+            time.sleep(0.05)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invitations', type=int, default=20000)
+    parser.add_argument('--replied', type=int, default=12000, help='Invitations with an RSVP')
+    parser.add_argument('--partial-every', type=int, default=10,
+                        help='Every Nth RSVP covers fewer seats than were invited')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated Brevo response time in seconds')
+    parser.add_argument('--budget-per-minute', type=int, default=120)
+    parser.add_argument('--budget-seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    server = start_fake_brevo(latency=args.latency)
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'BREVO_API_KEY': 'bench',
+        'BREVO_API_URL': server.url,
+        'BREVO_MAX_REQUESTS_PER_SECOND': '0',
+        'REMINDER_BATCH_SIZE': str(args.batch_size),
+        'LOG_LEVEL': 'WARNING'
+    })
+    from app import create_app, dispatch_reminders
+    from invitations import import_invitations
+    from migrations import upgrade_schema
+    from models import Guest, ReminderCampaign, ReminderDelivery, db, normalize_email
+    from reminders import claim_campaign, create_campaign, retry_failed
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    # Guest i replied for 2 seats; every --partial-every'th of them was invited with 3
+    seed_guests(app, args.replied)
+    partial = len(range(args.partial_every, args.replied + 1, args.partial_every))
+    no_reply = args.invitations - args.replied
+    failures = []
+
+    def check(label, condition):
+        print(f"  {'ok' if condition else 'FAILED'}: {label}")
+        if not condition:
+            failures.append(label)
+
+    def delivered():
+        return Counter(message['to'][0]['email'] for message in server.messages)
+
+    with app.app_context():
+        import_invitations((i, {'name': f'Guest {i}', 'email': f'guest{i}@example.com',
+                                'party_size': 3 if i <= args.replied and i % args.partial_every == 0 else 2})
+                           for i in range(1, args.invitations + 1))
+        app.config['REMINDER_SENDS_PER_MINUTE'] = 10 ** 9
+
+        print('throughput')
+        start = time.perf_counter()
+        campaign, recipients = create_campaign('all')
+        select_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        drain(dispatch_reminders)
+        elapsed = time.perf_counter() - start
+        stats = server.stats()
+        print(f"  {recipients} recipients selected in {select_ms:.1f}ms; sent in {elapsed:.2f}s "
+              f"({recipients / elapsed:.0f} msgs/s, {stats['requests']} Brevo requests)")
+        check(f'audience is {no_reply} without an RSVP plus {partial} partial', recipients == no_reply + partial)
+        check('every recipient got exactly one reminder',
+              len(delivered()) == recipients and set(delivered().values()) == {1})
+
+        print('resume')
+        server.reset()
+        campaign, recipients = create_campaign('no_reply')
+        db.session.commit()
+        drain(dispatch_reminders, seconds=0.2)
+        # A dispatcher that dies after committing its batch as 'sending' and
+        # before Brevo answers leaves that batch and the campaign lease behind
+        crashed = claim_campaign(lease_seconds=-1)
+        interrupted = db.session.execute(
+            db.select(ReminderDelivery)
+            .where(ReminderDelivery.campaign_id == crashed.id, ReminderDelivery.status == 'pending')
+            .order_by(ReminderDelivery.id).limit(args.batch_size)
+        ).scalars().all()
+        for delivery in interrupted:
+            delivery.status = 'sending'
+        interrupted_emails = {delivery.recipient for delivery in interrupted}
+        # Some recipients further down the list reply in the meantime
+        late = db.session.execute(
+            db.select(ReminderDelivery.recipient)
+            .where(ReminderDelivery.campaign_id == crashed.id, ReminderDelivery.status == 'pending',
+                   ReminderDelivery.recipient.notin_(interrupted_emails))
+            .order_by(ReminderDelivery.id.desc()).limit(25)
+        ).scalars().all()
+        for email in late:
+            db.session.add(Guest(name=email, email=email, email_normalized=normalize_email(email), guest_count=2,
+                                 welcome_lunch='attending', wedding_attendance='attending',
+                                 accommodation='no', farewell_lunch='attending'))
+        db.session.commit()
+        drain(dispatch_reminders)
+        statuses = dict(db.session.execute(
+            db.select(ReminderDelivery.status, db.func.count(ReminderDelivery.id))
+            .where(ReminderDelivery.campaign_id == campaign.id).group_by(ReminderDelivery.status)
+        ).all())
+        print(f'  {recipients} recipients; after resuming: {statuses}')
+        check('the interrupted batch was not resent', not interrupted_emails & set(delivered()))
+        check('late replies were skipped', statuses.get('skipped') == len(late) and not set(late) & set(delivered()))
+        check('everyone else got exactly one reminder',
+              len(delivered()) == recipients - len(interrupted) - len(late) and set(delivered().values()) == {1})
+        retried = retry_failed(campaign.id)
+        drain(dispatch_reminders)
+        check(f'retrying sent the {retried} interrupted reminders once',
+              retried == len(interrupted) and len(delivered()) == recipients - len(late)
+              and set(delivered().values()) == {1})
+
+        print('budget')
+        server.reset()
+        db.session.execute(db.update(ReminderDelivery).values(claimed_at=None))
+        db.session.commit()
+        app.config['REMINDER_SENDS_PER_MINUTE'] = args.budget_per_minute
+        campaign, recipients = create_campaign('no_reply')
+        processed = drain(dispatch_reminders, seconds=args.budget_seconds)
+        sent = server.stats()['messages']
+        print(f'  {sent} of {recipients} sent in {args.budget_seconds}s with a budget of '
+              f'{args.budget_per_minute} per minute ({server.stats()["requests"]} Brevo requests)')
+        check('sends stopped at the budget', processed == sent == min(args.budget_per_minute, recipients))
+        check('campaign left in progress', db.session.get(ReminderCampaign, campaign.id).status == 'sending')
+
+    if failures:
+        sys.exit(f"Reminder checks failed: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
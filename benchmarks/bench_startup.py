@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Worker start-up benchmark: boot time and memory per worker.
+
+First it boots the app --runs times in fresh interpreters, the way every
+gunicorn worker does, and reports the median time to import app.py and to
+run create_app(), the resident memory afterwards, and whether any of the
+lazily loaded modules (requests, openpyxl, PIL) were imported anyway. Then it
+starts gunicorn with --workers processes against a temporary database and
+reports the time until the first response and the memory of the master and
+each worker, read from /proc (proportional set size where the kernel
+provides it, so pages shared after the fork are split between processes).
+
+Exits non-zero when a lazily loaded module is imported during boot.
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--workers 4] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_suite import ROOT, git_commit, start_gunicorn, stop_gunicorn, upgrade_db
+
+LAZY_MODULES = ('requests', 'openpyxl', 'PIL')
+
+BOOT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+with open('/proc/self/status') as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'rss_mb': rss_kb / 1024,
+    'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def boot_once(env):
+    """Boot the app in a fresh interpreter and return its measurements"""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', BOOT_SCRIPT], cwd=ROOT, env={**os.environ, **env},
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def process_memory_mb(pid):
+    """Proportional set size of `pid` in MB, or its RSS when smaps_rollup is unavailable"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('Pss:')) / 1024
+    except (OSError, StopIteration):
+        with open(f'/proc/{pid}/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmRSS:')) / 1024
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name can contain spaces, so split after its closing parenthesis
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return sorted(children)
+
+
+def measure_gunicorn(env, workers, settle_timeout=30):
+    start = time.perf_counter()
+    process, _ = start_gunicorn(env, workers)
+    try:
+        first_response_ms = (time.perf_counter() - start) * 1000
+        deadline = time.monotonic() + settle_timeout
+        while len(child_pids(process.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        all_workers_ms = (time.perf_counter() - start) * 1000
+        return {
+            'workers': workers,
+            'first_response_ms': first_response_ms,
+            'all_workers_ms': all_workers_ms,
+            'master_mb': process_memory_mb(process.pid),
+            'worker_mb': [process_memory_mb(pid) for pid in child_pids(process.pid)]
+        }
+    finally:
+        stop_gunicorn(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreter boots to time')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    env = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'LOG_LEVEL': 'WARNING'
+    }
+    upgrade_db(env)
+
+    boots = [boot_once(env) for _ in range(args.runs)]
+    boot = {key: statistics.median(run[key] for run in boots)
+            for key in ('import_ms', 'create_app_ms', 'process_ms', 'rss_mb')}
+    loaded = sorted({name for run in boots for name in run['loaded']})
+    print(f"{'import ms':>10} {'create_app ms':>14} {'process ms':>11} {'RSS MB':>7}  lazy modules loaded")
+    print(f"{boot['import_ms']:>10.1f} {boot['create_app_ms']:>14.1f} {boot['process_ms']:>11.1f} "
+          f"{boot['rss_mb']:>7.1f}  {', '.join(loaded) or 'none'}")
+
+    server = measure_gunicorn(env, args.workers)
+    print(f"\ngunicorn, {args.workers} workers: first response after {server['first_response_ms']:.0f} ms, "
+          f"all workers up after {server['all_workers_ms']:.0f} ms")
+    print(f"master {server['master_mb']:.1f} MB, workers "
+          + ', '.join(f'{mb:.1f}' for mb in server['worker_mb']) + ' MB')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(), 'settings': vars(args), 'boot': boot, 'boot_runs': boots,
+                       'lazy_modules_loaded': loaded, 'gunicorn': server}, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {args.output}")
+    if loaded:
+        sys.exit(f"Imported at boot although they should load lazily: {', '.join(loaded)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the main pages.
+
+Seeds a temporary database with a growing number of synthetic parties and,
+at each size, drives home, submit_rsvp, admin, the admin guest API and
+schedule twice: in-process through the Flask test client, and over HTTP
+against a real `gunicorn 'app:create_app()'` running on a local port. Confirmation
+emails go through the outbox to a fake Brevo server (fake_brevo.py), so
+nothing leaves the machine.
+
+Every run reports p50/p99 latency and throughput per endpoint. Pass --output
+to save them as JSON along with the commit they were measured on, and
+--compare with an earlier file to print the change; the script then exits
+non-zero when any p50 got slower by more than --max-regression.
+
+Usage: python benchmarks/bench_suite.py [--guests 0,1000,10000] [--requests 200] [--concurrency 8]
+                                        [--modes client,gunicorn] [--workers 2]
+                                        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from fake_brevo import start_fake_brevo
+
+IMAGE_ACCEPT = 'image/avif,image/webp,image/*,*/*;q=0.8'
+
+_submissions = itertools.count()
+
+
+def rsvp_form():
+    index = next(_submissions)
+    return {
+        'name': f'Bench Guest {index}',
+        'email': f'bench{index}@example.com',
+        'guest_count': '2',
+        'guest_names[]': [f'Bench Guest {index}', 'Plus One'],
+        'welcome_lunch': 'attending',
+        'wedding_attendance': 'attending',
+        'accommodation': 'yes' if index % 2 else 'no',
+        'farewell_lunch': 'not_attending'
+    }
+
+
+# name -> (method, path, headers, form factory)
+ENDPOINTS = {
+    'home': ('GET', '/', {}, None),
+    'submit_rsvp': ('POST', '/submit_rsvp', {}, rsvp_form),
+    'admin': ('GET', '/admin', {}, None),
+    'admin_guests_api': ('GET', '/admin/api/guests', {}, None),
+    'schedule': ('GET', '/schedule', {'Accept': IMAGE_ACCEPT}, None)
+}
+
+
+def seed_guests(app, total, chunk_size=5000):
+    """Add parties of two until the guest table holds `total`, then rebuild the statistics row.
+
+    RSVPs submitted by earlier runs count towards the total.
+    """
+    from models import Guest, GuestMember, db, rebuild_rsvp_stats
+    with app.app_context():
+        count = max(total - db.session.execute(db.select(db.func.count(Guest.id))).scalar(), 0)
+        first_id = (db.session.execute(db.select(db.func.max(Guest.id))).scalar() or 0) + 1
+        for offset in range(first_id, first_id + count, chunk_size):
+            ids = range(offset, min(offset + chunk_size, first_id + count))
+            db.session.execute(db.insert(Guest), [{
+                'id': i,
+                'name': f'Guest {i}',
+                'email': f'guest{i}@example.com',
+                'email_normalized': f'guest{i}@example.com',
+                'guest_count': 2,
+                'message': '',
+                'created_at': datetime.utcnow(),
+                'welcome_lunch': 'attending',
+                'wedding_attendance': 'attending' if i % 5 else 'not_attending',
+                'accommodation': 'yes' if i % 2 else 'no',
+                'farewell_lunch': 'not_attending'
+            } for i in ids])
+            db.session.execute(db.insert(GuestMember), [
+                {'guest_id': i, 'position': position, 'name': name, 'name_normalized': name.lower()}
+                for i in ids for position, name in enumerate((f'Guest {i}', f'Partner {i}'))
+            ])
+        db.session.commit()
+        # Core inserts bypass the mapper events that maintain the statistics
+        rebuild_rsvp_stats()
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies) or [0.0]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        'rps': round((len(latencies) - errors) / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def run_client(client, endpoint, requests_count, warmup):
+    """Sequential requests through the Flask test client"""
+    method, path, headers, form = ENDPOINTS[endpoint]
+
+    def call():
+        response = client.open(path, method=method, headers=headers, data=form() if form else None)
+        return response.status_code < 400
+
+    for _ in range(warmup):
+        call()
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        request_start = time.perf_counter()
+        errors += not call()
+        latencies.append((time.perf_counter() - request_start) * 1000)
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def run_http(base_url, endpoint, requests_count, warmup, concurrency):
+    """`concurrency` keep-alive clients sharing `requests_count` requests over HTTP"""
+    method, path, headers, form = ENDPOINTS[endpoint]
+    url = base_url + path
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def call(session):
+        try:
+            response = session.request(method, url, headers=headers, data=form() if form else None, timeout=30)
+            return response.status_code < 400
+        except requests.RequestException:
+            return False
+
+    def client_loop():
+        with requests.Session() as session:
+            while next(remaining) < requests_count:
+                request_start = time.perf_counter()
+                ok = call(session)
+                elapsed = (time.perf_counter() - request_start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    errors[0] += not ok
+
+    with requests.Session() as session:
+        for _ in range(warmup):
+            call(session)
+    threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def upgrade_db(env):
+    """Create the schema with the release step, before any worker starts"""
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'upgrade-db'], cwd=ROOT,
+                   env={**os.environ, **env}, check=True, capture_output=True)
+
+
+def start_gunicorn(env, workers, timeout=60):
+    """Start gunicorn on a free port and wait until it answers"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'app:create_app()'],
+        cwd=ROOT, env={**os.environ, **env}
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            requests.get(base_url + '/', timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """Print the change against an earlier run; return the regressions beyond max_regression"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['mode'], r['guests'], r['endpoint']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline.get('commit') or baseline_path}:")
+    print(f"{'mode':<9} {'guests':>7} {'endpoint':<17} {'p50':>8} {'p99':>8} {'rps':>8}")
+    regressions = []
+    for result in results:
+        key = (result['mode'], result['guests'], result['endpoint'])
+        before = previous.get(key)
+        if before is None:
+            continue
+        changes = {metric: (result[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+                   for metric in ('p50_ms', 'p99_ms', 'rps')}
+        print(f"{key[0]:<9} {key[1]:>7} {key[2]:<17} {changes['p50_ms']:>+8.0%} "
+              f"{changes['p99_ms']:>+8.0%} {changes['rps']:>+8.0%}")
+        if changes['p50_ms'] > max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guests', default='0,1000,10000', help='Comma-separated guest counts to seed')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint and size')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests before each measurement')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent HTTP clients against gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--modes', default='client,gunicorn')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Earlier --output file to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed fractional p50 slowdown before --compare fails')
+    args = parser.parse_args()
+    modes = args.modes.split(',')
+    endpoints = args.endpoints.split(',')
+
+    brevo = start_fake_brevo()
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    env = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'BREVO_API_KEY': 'bench',
+        'BREVO_API_URL': brevo.url,
+        'OUTBOX_WORKER_THREAD': 'true',
+        'IMAGE_CACHE_DIR': os.path.join(tmpdir, 'image_cache'),
+        'LOG_LEVEL': 'WARNING',
+        # Every submission comes from one address; bench_rate_limit.py covers the limiter
+        'RATE_LIMIT_ENABLED': 'false'
+    }
+    os.environ.update(env)
+    upgrade_db(env)
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+
+    results = []
+    print(f"{'mode':<9} {'guests':>7} {'endpoint':<17} {'requests':>8} {'errors':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'rps':>8}")
+    for size in sorted(int(s) for s in args.guests.split(',')):
+        seed_guests(app, size)
+        for mode in modes:
+            if mode == 'gunicorn':
+                process, base_url = start_gunicorn(env, args.workers)
+            try:
+                for endpoint in endpoints:
+                    if mode == 'client':
+                        result = run_client(client, endpoint, args.requests, args.warmup)
+                    else:
+                        result = run_http(base_url, endpoint, args.requests, args.warmup, args.concurrency)
+                    result = {'mode': mode, 'guests': size, 'endpoint': endpoint, **result}
+                    results.append(result)
+                    print(f"{mode:<9} {size:>7} {endpoint:<17} {result['requests']:>8} {result['errors']:>6} "
+                          f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['rps']:>8.1f}")
+            finally:
+                if mode == 'gunicorn':
+                    stop_gunicorn(process)
+
+    # Give the in-process dispatcher a moment to drain the confirmation emails
+    time.sleep(app.config['OUTBOX_POLL_INTERVAL'])
+    emails = brevo.stats()
+    print(f"\nFake Brevo received {emails['messages']} emails in {emails['requests']} requests")
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'requests': args.requests, 'warmup': args.warmup, 'concurrency': args.concurrency,
+                     'workers': args.workers},
+        'emails': emails,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            sys.exit(f"{len(regressions)} endpoint(s) slowed down by more than {args.max_regression:.0%} at p50")
+
+
+if __name__ == '__main__':
+    main()
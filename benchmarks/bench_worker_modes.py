@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Concurrent RSVP submissions under each gunicorn worker class.
+
+For every mode in --modes (sync, gthread, gevent) this starts gunicorn with
+gunicorn.conf.py against a fresh temporary SQLite database, posts RSVPs from
+--concurrency keep-alive clients, then waits for the outbox to deliver every
+confirmation to a fake Brevo server that answers after --brevo-latency
+seconds. It reports submission latency and throughput, how long the emails
+took to drain, and whether `flask stats-check` still agrees with the guest
+table afterwards, which would catch sessions leaking between greenlets.
+
+Usage: python benchmarks/bench_worker_modes.py [--modes sync,gthread,gevent] [--workers 2]
+                                               [--threads 8] [--concurrency 32] [--requests 400]
+                                               [--brevo-latency 0.2] [--output modes.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_suite import ROOT, git_commit, run_http, start_gunicorn, stop_gunicorn, upgrade_db
+from fake_brevo import start_fake_brevo
+
+
+def mode_env(mode, threads):
+    if mode == 'gthread':
+        return {'WEB_WORKER_CLASS': 'gthread', 'WEB_THREADS': str(threads)}
+    return {'WEB_WORKER_CLASS': mode}
+
+
+def wait_for_emails(brevo, expected, timeout):
+    """Seconds until the fake server has `expected` messages, or None on timeout"""
+    start = time.perf_counter()
+    while brevo.stats()['messages'] < expected:
+        if time.perf_counter() - start > timeout:
+            return None
+        time.sleep(0.1)
+    return time.perf_counter() - start
+
+
+def run_mode(mode, args, brevo):
+    workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    tmpdir = workdir.name
+    env = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'BREVO_API_KEY': 'bench',
+        'BREVO_API_URL': brevo.url,
+        'OUTBOX_WORKER_THREAD': 'true',
+        'OUTBOX_POLL_INTERVAL': '0.5',
+        'LOG_LEVEL': 'WARNING',
+        'RATE_LIMIT_ENABLED': 'false',
+        **mode_env(mode, args.threads)
+    }
+    upgrade_db(env)
+
+    brevo.reset()
+    process, base_url = start_gunicorn(env, args.workers)
+    try:
+        result = run_http(base_url, 'submit_rsvp', args.requests, 0, args.concurrency)
+        # Sent emails are delivered by the workers' dispatchers, so keep them running
+        delivered = args.requests - result['errors']
+        drain_seconds = wait_for_emails(brevo, delivered, args.drain_timeout)
+    finally:
+        stop_gunicorn(process)
+    stats_check = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'stats-check'], cwd=ROOT,
+                                 env={**os.environ, **env}, capture_output=True, text=True)
+    return {
+        'mode': mode,
+        **result,
+        'emails': brevo.stats()['messages'],
+        'drain_s': round(drain_seconds, 2) if drain_seconds is not None else None,
+        'stats_consistent': stats_check.returncode == 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes per mode')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per worker in gthread mode')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent HTTP clients')
+    parser.add_argument('--requests', type=int, default=400, help='RSVPs to submit per mode')
+    parser.add_argument('--brevo-latency', type=float, default=0.2, help='Seconds the fake Brevo takes per request')
+    parser.add_argument('--drain-timeout', type=float, default=60, help='Seconds to wait for emails to be delivered')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    brevo = start_fake_brevo(latency=args.brevo_latency)
+    print(f"{'mode':<8} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8} {'rps':>7} "
+          f"{'emails':>6} {'drain s':>8} {'stats':>6}")
+    results = []
+    for mode in args.modes.split(','):
+        result = run_mode(mode, args, brevo)
+        results.append(result)
+        drain = f"{result['drain_s']:.2f}" if result['drain_s'] is not None else 'timeout'
+        print(f"{mode:<8} {result['requests']:>8} {result['errors']:>6} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['rps']:>7.1f} {result['emails']:>6} {drain:>8} "
+              f"{'ok' if result['stats_consistent'] else 'DRIFT':>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(), 'settings': vars(args), 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {args.output}")
+    if not all(result['stats_consistent'] and not result['errors'] for result in results):
+        sys.exit('Some submissions failed or left the statistics inconsistent')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Concurrent RSVP write load test.
+
+Starts several worker processes, like gunicorn workers, each posting RSVPs
+from several threads against one shared database. It reports throughput,
+latency and failed submissions (a 500 from submit_rsvp, which is how
+"database is locked" surfaces). Some of the posts reuse a small pool of
+email addresses, so the upsert path also runs under contention; afterwards
+`flask stats-check` must still agree with the guest table, and the script
+exits non-zero when it does not.
+
+By default it runs against a temporary SQLite file twice, once with the WAL
+and busy_timeout tuning from config.py and once without. Pass
+--database-url to run against PostgreSQL (needs psycopg2) or any other URL.
+
+Usage: python benchmarks/load_concurrent_rsvp.py [--processes 4] [--threads 4] [--requests 100]
+                                                 [--database-url postgresql://...]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rsvp_form(worker, thread, index):
+    shared = index % 10 == 0
+    email = f'shared{index // 10 % 5}@example.com' if shared else f'w{worker}t{thread}n{index}@example.com'
+    return {
+        'name': f'Guest {worker}-{thread}-{index}',
+        'email': email,
+        'guest_count': '2',
+        'guest_names[]': [f'Guest {worker}-{thread}-{index}', 'Plus One'],
+        'welcome_lunch': 'attending',
+        'wedding_attendance': 'attending',
+        'accommodation': 'yes' if index % 2 else 'no',
+        'farewell_lunch': 'not_attending'
+    }
+
+
+def run_worker(worker, threads, requests_per_thread, env, ready, go, results):
+    """One 'gunicorn worker': its own app instance and connection pool"""
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    try:
+        from app import create_app
+        app = create_app()
+    except Exception as e:
+        # Count a worker that cannot boot as failing every request it would have served
+        print(f"Worker {worker} failed to start: {e}", file=sys.stderr)
+        ready.put(worker)
+        results.put(([], ['boot'] * threads * requests_per_thread))
+        return
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def post_many(thread):
+        client = app.test_client()
+        for index in range(requests_per_thread):
+            start = time.perf_counter()
+            response = client.post('/submit_rsvp', data=rsvp_form(worker, thread, index))
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+    pool = [threading.Thread(target=post_many, args=(thread,)) for thread in range(threads)]
+    ready.put(worker)
+    go.wait()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((latencies, failures))
+
+
+def run(database_url, processes, threads, requests_per_thread, extra_env):
+    env = {
+        'DATABASE_URL': database_url,
+        'FLASK_ENV': 'production',
+        'OUTBOX_WORKER_THREAD': 'false',
+        'BREVO_API_KEY': '',
+        'RATE_LIMIT_ENABLED': 'false',
+        'LOG_LEVEL': 'ERROR',
+        **extra_env
+    }
+    # Create the schema with the release step, before any worker starts
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'upgrade-db'], cwd=ROOT,
+                   env={**os.environ, **env}, check=True, capture_output=True)
+
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    go = context.Event()
+    results = context.Queue()
+    workers = [context.Process(target=run_worker, args=(worker, threads, requests_per_thread, env, ready, go, results))
+               for worker in range(processes)]
+    for worker in workers:
+        worker.start()
+    # Time only the requests, not interpreter start-up
+    for _ in workers:
+        ready.get()
+    start = time.perf_counter()
+    go.set()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    stats_check = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'stats-check'], cwd=ROOT,
+                                 env={**os.environ, **env}, capture_output=True, text=True)
+
+    latencies = sorted(latency for worker_latencies, _ in collected for latency in worker_latencies) or [0.0]
+    failures = [status for _, worker_failures in collected for status in worker_failures]
+    return {
+        'requests': processes * threads * requests_per_thread,
+        'failed': len(failures),
+        'seconds': elapsed,
+        'rps': (processes * threads * requests_per_thread - len(failures)) / elapsed,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'stats_consistent': stats_check.returncode == 0,
+        'stats_drift': stats_check.stdout.strip() if stats_check.returncode else ''
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per thread')
+    parser.add_argument('--database-url', help='Run once against this database instead of comparing SQLite modes')
+    args = parser.parse_args()
+
+    if args.database_url:
+        scenarios = {args.database_url.split(':', 1)[0]: (args.database_url, {})}
+    else:
+        workdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        tmpdir = workdir.name
+        scenarios = {
+            'sqlite tuned': (f"sqlite:///{os.path.join(tmpdir, 'tuned.db')}", {'SQLITE_TUNING': 'true'}),
+            'sqlite default': (f"sqlite:///{os.path.join(tmpdir, 'default.db')}", {'SQLITE_TUNING': 'false'})
+        }
+
+    print(f"{'backend':<15} {'requests':>8} {'failed':>7} {'rps':>7} {'p50 ms':>8} {'p99 ms':>8}  stats")
+    drifted = []
+    for label, (database_url, extra_env) in scenarios.items():
+        # Each scenario needs a fresh interpreter so config.py re-reads the environment
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        process = context.Process(target=_run_scenario, args=(queue, database_url, args, extra_env))
+        process.start()
+        result = queue.get()
+        process.join()
+        print(f"{label:<15} {result['requests']:>8} {result['failed']:>7} {result['rps']:>7.0f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}  {'ok' if result['stats_consistent'] else 'DRIFT'}")
+        if not result['stats_consistent']:
+            print(result['stats_drift'])
+            drifted.append(label)
+    if drifted:
+        sys.exit(f"RSVP statistics drifted from the guest table: {', '.join(drifted)}")
+
+
+def _run_scenario(queue, database_url, args, extra_env):
+    queue.put(run(database_url, args.processes, args.threads, args.requests, extra_env))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Brevo transactional email client.
+
+One pooled keep-alive session per process. Messages that share a sender are
+coalesced into multi-recipient `messageVersions` requests, and requests are
+spaced to stay under a configurable rate limit. A 429 from Brevo surfaces as
+BrevoRateLimited with the number of seconds to wait. An optional
+`on_request(seconds, outcome)` callback is told how every API call went.
+
+`requests` is imported by the first client a process creates, so workers
+that never send email do not pay for loading it.
+"""
+
+import threading
+import time
+
+BREVO_API_URL = 'https://api.brevo.com/v3'
+DISABLED_WARNING = ("BREVO_API_KEY not set, email functionality is disabled. To test email locally, "
+                    "add BREVO_API_KEY to a .env file; get a key from https://app.brevo.com/settings/keys/api")
+
+
+class BrevoError(Exception):
+    """Brevo rejected a request"""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Brevo API error: {status_code} - {message}")
+        self.status_code = status_code
+
+
+class BrevoRateLimited(BrevoError):
+    """Brevo asked us to slow down"""
+
+    def __init__(self, status_code, message, retry_after):
+        super().__init__(status_code, message)
+        self.retry_after = retry_after
+
+
+class BrevoClient:
+    """Sends transactional emails through a pooled session, one or many per request"""
+
+    def __init__(self, api_key, base_url=BREVO_API_URL, timeout=10, batch_size=50,
+                 max_requests_per_second=None, pool_size=10, on_request=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = base_url.rstrip('/') + '/smtp/email'
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / max_requests_per_second if max_requests_per_second else 0
+        self.on_request = on_request
+        self.session = requests.Session()
+        self.session.mount(self.url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            'accept': 'application/json',
+            'content-type': 'application/json',
+            'api-key': api_key
+        })
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self._network_errors = requests.RequestException
+
+    def _throttle(self):
+        """Block until the client-side rate limit allows another request"""
+        if not self.min_interval:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _post(self, payload):
+        self._throttle()
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except self._network_errors:
+            self._report(start, 'network_error')
+            raise
+        self._report(start, 'ok' if response.status_code in (200, 201, 202)
+                     else 'rate_limited' if response.status_code == 429 else 'error')
+        if response.status_code in (200, 201, 202):
+            return response.json() if response.content else {}
+        if response.status_code == 429:
+            raise BrevoRateLimited(response.status_code, response.text, _retry_after(response))
+        raise BrevoError(response.status_code, response.text)
+
+    def _report(self, start, outcome):
+        if self.on_request is not None:
+            self.on_request(time.perf_counter() - start, outcome)
+
+    def send(self, sender, message):
+        """Send one message: a dict with 'to', 'subject' and 'htmlContent'"""
+        return self._post({'sender': sender, **message})
+
+    def send_batch(self, sender, messages):
+        """Send messages in as few requests as possible.
+
+        Every chunk of up to `batch_size` messages becomes one request whose
+        `messageVersions` carry each recipient's subject and body. Returns one
+        response per request, in order.
+        """
+        responses = []
+        for start in range(0, len(messages), self.batch_size):
+            chunk = messages[start:start + self.batch_size]
+            if len(chunk) == 1:
+                responses.append(self.send(sender, chunk[0]))
+                continue
+            responses.append(self._post({
+                'sender': sender,
+                'subject': chunk[0]['subject'],
+                'htmlContent': chunk[0]['htmlContent'],
+                'messageVersions': [
+                    {'to': message['to'], 'subject': message['subject'], 'htmlContent': message['htmlContent']}
+                    for message in chunk
+                ]
+            }))
+        return responses
+
+    def close(self):
+        self.session.close()
+
+
+def _retry_after(response):
+    """Seconds to wait according to Brevo's rate limit headers"""
+    for header in ('Retry-After', 'x-sib-ratelimit-reset'):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return max(float(value), 0)
+            except ValueError:
+                pass
+    return 1.0
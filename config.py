@@ -4,6 +4,35 @@ from dotenv import load_dotenv
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() == 'true'
+
+def database_url():
+    """DATABASE_URL, accepting the postgres:// scheme hosting providers hand out"""
+    url = os.environ.get('DATABASE_URL', 'sqlite:///wedding.db')
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(url):
+    """SQLAlchemy engine options for the configured backend.
+
+    SQLite gets its per-connection pragmas from a connect hook in app.py;
+    here it only needs the driver-level lock timeout. Server databases get a
+    bounded, pre-pinged connection pool.
+    """
+    if url.startswith('sqlite'):
+        return {
+            'connect_args': {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')) / 1000}
+        }
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', 'true')
+    }
+
 class Config:
     """Configuration class for the Flask application"""
     
@@ -12,12 +41,92 @@ class Config:
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
     
     # Database Configuration
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///wedding.db')
+    SQLALCHEMY_DATABASE_URI = database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # SQLite tuning for several gunicorn workers sharing one file: WAL lets
+    # readers run alongside the writer, busy_timeout makes writers queue
+    # instead of failing with "database is locked"
+    SQLITE_TUNING = _env_flag('SQLITE_TUNING', 'true')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
     
     # Email Configuration
     BREVO_API_KEY = os.environ.get('BREVO_API_KEY')
     FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@yourdomain.com')
+    BREVO_API_URL = os.environ.get('BREVO_API_URL', 'https://api.brevo.com/v3')
+    BREVO_TIMEOUT = float(os.environ.get('BREVO_TIMEOUT', '10'))
+    BREVO_BATCH_SIZE = int(os.environ.get('BREVO_BATCH_SIZE', '50'))
+    BREVO_MAX_REQUESTS_PER_SECOND = float(os.environ.get('BREVO_MAX_REQUESTS_PER_SECOND', '5'))
+    
+    # Email Outbox Configuration
+    # Set OUTBOX_WORKER_THREAD=false when running `flask --app app outbox-worker` as a separate process
+    OUTBOX_WORKER_THREAD = _env_flag('OUTBOX_WORKER_THREAD', 'true')
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '5'))
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '20'))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+    OUTBOX_BACKOFF_BASE = float(os.environ.get('OUTBOX_BACKOFF_BASE', '30'))
+    OUTBOX_BACKOFF_MAX = float(os.environ.get('OUTBOX_BACKOFF_MAX', '3600'))
+    OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+    
+    # Reminder campaigns are sent by the outbox dispatcher, in Brevo batches of
+    # up to REMINDER_BATCH_SIZE and never more than REMINDER_SENDS_PER_MINUTE
+    # reminders in any minute
+    REMINDER_SENDS_PER_MINUTE = int(os.environ.get('REMINDER_SENDS_PER_MINUTE', '60'))
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', '50'))
+    
+    # Seconds a submitted RSVP response is replayed for repeats of the same request
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '600'))
+    
+    # Token-bucket limits on /submit_rsvp, per client IP and per email address:
+    # *_BURST submissions at once, refilled at *_PER_HOUR. The 'sqlite' backend
+    # shares the buckets between the workers on a host through
+    # RATE_LIMIT_SQLITE_PATH (defaults to instance/ratelimit.db); 'memory'
+    # keeps them per worker. Client IPs are read from the last
+    # PROXY_FIX_X_FOR X-Forwarded-For hops (1 behind Render's proxy, 0 when
+    # clients connect directly).
+    RATE_LIMIT_ENABLED = _env_flag('RATE_LIMIT_ENABLED', 'true')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite')
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH')
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+    RATE_LIMIT_IP_BURST = int(os.environ.get('RATE_LIMIT_IP_BURST', '10'))
+    RATE_LIMIT_IP_PER_HOUR = float(os.environ.get('RATE_LIMIT_IP_PER_HOUR', '30'))
+    RATE_LIMIT_EMAIL_BURST = int(os.environ.get('RATE_LIMIT_EMAIL_BURST', '5'))
+    RATE_LIMIT_EMAIL_PER_HOUR = float(os.environ.get('RATE_LIMIT_EMAIL_PER_HOUR', '10'))
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', '1'))
+    
+    # Capacity planning on the admin page. PLANNING_ROOM_TYPES lists the rooms
+    # as name:CAPACITYxCOUNT; PLANNING_INVITED_GUESTS (people invited, 0 to use
+    # the seats on the imported invite list) drives the projections for guests
+    # who have not replied; catering counts add PLANNING_CATERING_BUFFER on top
+    # of the projected headcount.
+    PLANNING_ROOM_TYPES = os.environ.get('PLANNING_ROOM_TYPES', 'double:2x20,twin:2x10,family:4x5')
+    PLANNING_INVITED_GUESTS = int(os.environ.get('PLANNING_INVITED_GUESTS', '0'))
+    PLANNING_CATERING_BUFFER = float(os.environ.get('PLANNING_CATERING_BUFFER', '0.05'))
+    
+    # Image variant cache (defaults to instance/image_cache)
+    IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR')
+    
+    # Admin live updates (Server-Sent Events). An open stream holds a worker,
+    # so with sync workers each connection only sends pending changes and the
+    # browser reconnects every ADMIN_STREAM_RETRY_MS; with gthread or gevent
+    # workers a stream stays open for up to ADMIN_STREAM_MAX_SECONDS.
+    WEB_WORKER_CLASS = os.environ.get('WEB_WORKER_CLASS', 'sync')
+    ADMIN_STREAM_MAX_SECONDS = float(os.environ.get('ADMIN_STREAM_MAX_SECONDS',
+                                                    '0' if WEB_WORKER_CLASS == 'sync' else '300'))
+    ADMIN_STREAM_POLL_SECONDS = float(os.environ.get('ADMIN_STREAM_POLL_SECONDS', '2'))
+    ADMIN_STREAM_RETRY_MS = int(os.environ.get('ADMIN_STREAM_RETRY_MS', '3000'))
+    
+    # Logging: LOG_FORMAT is 'json' (one object per line) or 'text'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    
+    # Per-request profiling: when enabled, a request sent with an X-Profile
+    # header is run under cProfile and the stats are saved to PROFILE_DIR
+    # (defaults to instance/profiles). Leave off on public deployments.
+    PROFILING_ENABLED = _env_flag('PROFILING_ENABLED', 'false')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
     
     # Optional: Custom domain
     CUSTOM_DOMAIN = os.environ.get('CUSTOM_DOMAIN')
@@ -25,6 +134,7 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
     
 class ProductionConfig(Config):
     """Production configuration"""
@@ -0,0 +1,88 @@
+"""
+Confirmation and reminder email rendering.
+
+Each email is a large static template with a few per-guest values. It is
+rendered once per Jinja environment with a marker in place of each value and
+split around the markers, so a send only escapes its values and joins them
+in, without running the template. The reminder's wording depends on the
+party size and the seats already replied for, so it is rendered once per
+combination of those.
+"""
+
+from functools import lru_cache
+
+from markupsafe import Markup
+
+CONFIRMATION_SUBJECT = "Crystal & Yang's Wedding - RSVP Confirmation"
+CONFIRMATION_TEMPLATE = 'emails/rsvp_confirmation.html'
+CONFIRMATION_DETAILS_TEMPLATE = 'emails/rsvp_confirmation_details.html'
+CONFIRMATION_SLOTS = ('name', 'guest_names_text', 'welcome_lunch', 'wedding_attendance', 'accommodation', 'farewell_lunch')
+REMINDER_SUBJECT = "Crystal & Yang's Wedding - Please RSVP"
+REMINDER_TEMPLATE = 'emails/rsvp_reminder.html'
+REMINDER_DETAILS_TEMPLATE = 'emails/rsvp_reminder_details.html'
+
+RESPONSE_LABELS = {
+    'attending': 'Attending',
+    'not_attending': 'Not Attending',
+    'yes': 'Yes',
+    'no': 'No'
+}
+
+_SLOT_MARKER = '\x00{}\x00'
+
+
+def response_label(value):
+    """Human readable label for a stored RSVP answer"""
+    return RESPONSE_LABELS.get(value) or (value or '').replace('_', ' ').title()
+
+
+@lru_cache(maxsize=256)
+def _email_parts(jinja_env, template, details_template, slots, fixed=()):
+    """Render an email once with a marker for each name in `slots` and `fixed` values for the rest.
+
+    Returns the static text between the markers, alternating with the slot
+    name each marker stood for. The templates may only print slot values as
+    they are ({{ name }}); anything that tests or filters a value has to get
+    it through `fixed`.
+    """
+    markers = {slot: Markup(_SLOT_MARKER.format(slot)) for slot in slots}
+    details = jinja_env.get_template(details_template).render(**dict(fixed), **markers)
+    return tuple(jinja_env.get_template(template).render(details=Markup(details)).split('\x00'))
+
+
+def _escape(value):
+    """markupsafe.escape's output as a plain str, without building a Markup per value"""
+    return (str(value).replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;')
+            .replace("'", '&#39;').replace('"', '&#34;'))
+
+
+def _fill(parts, values):
+    """Join the static parts of an email with the escaped value of each slot"""
+    filled = list(parts)
+    for i in range(1, len(filled), 2):
+        filled[i] = _escape(values[filled[i]])
+    return ''.join(filled)
+
+
+def render_confirmation_email(jinja_env, name, guest_names, welcome_lunch, wedding_attendance, accommodation, farewell_lunch):
+    """Return the HTML body of the RSVP confirmation for one party"""
+    parts = _email_parts(jinja_env, CONFIRMATION_TEMPLATE, CONFIRMATION_DETAILS_TEMPLATE, CONFIRMATION_SLOTS)
+    return _fill(parts, {
+        'name': name,
+        'guest_names_text': ", ".join(guest_names) if guest_names else name,
+        'welcome_lunch': response_label(welcome_lunch),
+        'wedding_attendance': response_label(wedding_attendance),
+        'accommodation': response_label(accommodation),
+        'farewell_lunch': response_label(farewell_lunch)
+    })
+
+
+def render_reminder_email(jinja_env, name, party_size, replied_seats=0):
+    """Return the HTML body of the RSVP reminder for one invited party.
+
+    `replied_seats` is the party size of an RSVP already received from the
+    same email, when it covers fewer seats than were invited.
+    """
+    parts = _email_parts(jinja_env, REMINDER_TEMPLATE, REMINDER_DETAILS_TEMPLATE, ('name',),
+                         (('party_size', party_size), ('replied_seats', replied_seats)))
+    return _fill(parts, {'name': name})
@@ -0,0 +1,88 @@
+"""
+RSVP export writers.
+
+Both writers consume an iterator of rows and never hold more than one chunk
+in memory. CSV is streamed as it is produced. XLSX has to be finished before
+its zip directory can be written, so it is built with openpyxl's write-only
+workbook in a temporary file and then streamed from disk. openpyxl takes
+about a tenth of a second to import, so it is only loaded by the first XLSX
+export a worker serves.
+
+Names and messages are typed in by guests, and the exports are opened in
+spreadsheet programs. Text that a spreadsheet would read as a formula is
+therefore prefixed with an apostrophe in both formats.
+"""
+
+import csv
+import functools
+import importlib.util
+import io
+import os
+import tempfile
+
+EXPORT_COLUMNS = (
+    'party_id',
+    'primary_contact',
+    'email',
+    'attendee',
+    'party_size',
+    'wedding',
+    'welcome_lunch',
+    'farewell_lunch',
+    'accommodation',
+    'message',
+    'submitted_at'
+)
+
+CSV_FLUSH_ROWS = 500
+FILE_CHUNK_SIZE = 64 * 1024
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def safe_cell(value):
+    """Text that would start a spreadsheet formula, with a leading apostrophe"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows):
+    """Yield the CSV export in chunks of CSV_FLUSH_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([safe_cell(value) for value in row])
+        if count % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@functools.cache
+def xlsx_available():
+    """Whether openpyxl is installed, checked without importing it"""
+    return importlib.util.find_spec('openpyxl') is not None
+
+
+def xlsx_chunks(rows):
+    """Build the XLSX export on disk with a write-only workbook, then yield it"""
+    if not xlsx_available():
+        raise RuntimeError('openpyxl is not installed')
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('RSVPs')
+    sheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        sheet.append([safe_cell(value) for value in row])
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(FILE_CHUNK_SIZE), b''):
+                yield chunk
+    finally:
+        os.remove(path)
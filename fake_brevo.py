@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Brevo's transactional email API.
+
+Accepts POST /v3/smtp/email exactly like Brevo (single messages and
+`messageVersions` batches), records what it receives instead of sending, and
+can simulate latency and rate limiting. GET /_stats returns request and
+recipient counts, GET /_messages returns every recorded recipient, and
+DELETE /_messages clears them.
+
+Point the app at it with BREVO_API_URL=http://127.0.0.1:8025/v3.
+
+Usage: python fake_brevo.py [--port 8025] [--latency 0.05] [--rate-limit 10]
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeBrevoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit=None):
+        super().__init__(address, FakeBrevoHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit  # requests per second, None for unlimited
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self.messages = []
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def allow_request(self):
+        """Fixed one-second window rate limiter"""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.rate_limit
+
+    def record(self, payload):
+        """Store one entry per recipient message and return their ids"""
+        versions = payload.get('messageVersions') or [payload]
+        recorded = []
+        for version in versions:
+            recorded.append({
+                'sender': payload.get('sender'),
+                'to': version.get('to'),
+                'subject': version.get('subject', payload.get('subject')),
+                'htmlContent': version.get('htmlContent', payload.get('htmlContent'))
+            })
+        with self.lock:
+            self.requests += 1
+            start = len(self.messages)
+            self.messages.extend(recorded)
+        return [f"<fake-{start + offset}@brevo.local>" for offset in range(len(recorded))]
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests, 'rejected': self.rejected, 'messages': len(self.messages)}
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.rejected = 0
+            self.messages = []
+
+
+class FakeBrevoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Answer keep-alive requests without waiting on Nagle's algorithm
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            self._reply(200, self.server.stats())
+        elif self.path == '/_messages':
+            with self.server.lock:
+                self._reply(200, list(self.server.messages))
+        else:
+            self._reply(404, {'code': 'not_found'})
+
+    def do_DELETE(self):
+        if self.path == '/_messages':
+            self.server.reset()
+            self._reply(200, {'cleared': True})
+        else:
+            self._reply(404, {'code': 'not_found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        if self.path != '/v3/smtp/email':
+            self._reply(404, {'code': 'not_found'})
+            return
+        if not self.headers.get('api-key'):
+            self._reply(401, {'code': 'unauthorized', 'message': 'Key not found'})
+            return
+        if not self.server.allow_request():
+            with self.server.lock:
+                self.server.rejected += 1
+            self._reply(429, {'code': 'too_many_requests'}, {'Retry-After': '1', 'x-sib-ratelimit-reset': '1'})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, {'code': 'invalid_parameter', 'message': 'Malformed JSON'})
+            return
+        if not payload.get('sender') or not (payload.get('to') or payload.get('messageVersions')):
+            self._reply(400, {'code': 'missing_parameter', 'message': 'sender and to are required'})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        message_ids = self.server.record(payload)
+        if payload.get('messageVersions'):
+            self._reply(201, {'messageIds': message_ids})
+        else:
+            self._reply(201, {'messageId': message_ids[0]})
+
+
+def start_fake_brevo(host='127.0.0.1', port=0, latency=0.0, rate_limit=None):
+    """Start the fake server on a background thread and return it"""
+    server = FakeBrevoServer((host, port), latency=latency, rate_limit=rate_limit)
+    threading.Thread(target=server.serve_forever, name='fake-brevo', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering each send')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second before answering 429')
+    args = parser.parse_args()
+
+    server = FakeBrevoServer((args.host, args.port), latency=args.latency, rate_limit=args.rate_limit)
+    print(f"Fake Brevo listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
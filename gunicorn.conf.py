@@ -0,0 +1,45 @@
+"""
+gunicorn settings, read automatically by `gunicorn 'app:create_app()'` from this directory.
+
+WEB_WORKER_CLASS picks how each worker process handles concurrent requests:
+
+- sync (default): one request at a time per process
+- gthread: WEB_THREADS requests at a time per process, on OS threads
+- gevent: up to WEB_WORKER_CONNECTIONS requests at a time per process, on
+  greenlets. gunicorn monkey-patches the standard library before it imports
+  the app, so sockets (requests/Brevo), sleeps, locks, events and the outbox
+  dispatcher thread all yield to other greenlets instead of blocking.
+
+Everything else keeps gunicorn's defaults, including WEB_CONCURRENCY for the
+number of processes and PORT for the bind address. The schema is not touched
+here or by the workers; run `flask --app app upgrade-db` before starting.
+"""
+
+import os
+
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'sync')
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = int(os.environ.get('WEB_THREADS', '1'))
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', '1000'))
+timeout = int(os.environ.get('WEB_TIMEOUT', '30'))
+
+
+def when_ready(server):
+    """Log deployment-wide warnings once from the master rather than from every worker"""
+    # Imported here because gunicorn reads every module-level name as a setting
+    from brevo import DISABLED_WARNING as BREVO_DISABLED_WARNING
+    from config import config
+
+    if not config[os.environ.get('FLASK_ENV', 'development')].BREVO_API_KEY:
+        server.log.warning(BREVO_DISABLED_WARNING)
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative under gevent, before the app opens its first connection"""
+    if worker_class != 'gevent':
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return
+    patch_psycopg()
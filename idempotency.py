@@ -0,0 +1,82 @@
+"""
+Short-lived cache of responses to non-idempotent requests.
+
+A request is identified by its Idempotency-Key header; requests without one
+are not cached. The first request with a key runs normally
+and its response is stored for `ttl` seconds; repeats within that window get
+the stored response without touching the database. A repeat that arrives
+while the first is still running waits for it instead of running twice.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class IdempotencyConflict(Exception):
+    """The same key was reused for a request with a different body"""
+
+
+class _Entry:
+    __slots__ = ('fingerprint', 'expires_at', 'response', 'done')
+
+    def __init__(self, fingerprint, expires_at):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.response = None
+        self.done = threading.Event()
+
+
+class IdempotencyCache:
+    """Per-process LRU of recent responses, bounded by `max_entries`"""
+
+    def __init__(self, ttl=600, max_entries=10000, wait_timeout=10):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(items):
+        """Stable hash of a request body given as (name, value) pairs"""
+        sha = hashlib.sha256()
+        for name, value in sorted(items):
+            sha.update(name.encode('utf-8') + b'\0' + value.encode('utf-8') + b'\0')
+        return sha.hexdigest()
+
+    def begin(self, key, fingerprint):
+        """Claim `key` for this request.
+
+        Returns None when the caller should process the request and then call
+        `finish`, or the stored response of an earlier identical request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._entries[key] = _Entry(fingerprint, now + self.ttl)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return None
+            self._entries.move_to_end(key)
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyConflict(key)
+        entry.done.wait(self.wait_timeout)
+        return entry.response
+
+    def finish(self, key, response):
+        """Store the response for `key`, or forget the key when response is None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if response is None:
+                del self._entries[key]
+            else:
+                entry.response = response
+        entry.done.set()
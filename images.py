@@ -0,0 +1,127 @@
+"""
+Responsive image variants.
+
+Source images are resized to a fixed ladder of widths and re-encoded as
+AVIF, WebP or JPEG, picked from the browser's Accept header. Variants are
+generated on first request (or ahead of time with `flask --app app
+build-images`) and cached on disk under names that include a hash of the
+source file, so a changed source never serves a stale variant.
+
+Pillow is only imported by the first request that needs an image, so
+workers that never serve one do not pay for it at boot.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+
+SAVE_OPTIONS = {
+    'AVIF': {'quality': 60, 'speed': 6},
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True}
+}
+
+_source_cache = {}
+_build_lock = threading.Lock()
+
+
+@functools.cache
+def image_formats():
+    """(format, mimetype, extension) the local Pillow build can encode, preferred first"""
+    from PIL import features
+    return [
+        (fmt, mimetype, ext) for fmt, mimetype, ext, feature in (
+            ('AVIF', 'image/avif', 'avif', 'avif'),
+            ('WEBP', 'image/webp', 'webp', 'webp'),
+            ('JPEG', 'image/jpeg', 'jpg', None)
+        ) if feature is None or features.check(feature)
+    ]
+
+
+def negotiate_format(accept_mimetypes):
+    """Best format the client explicitly accepts; JPEG works everywhere"""
+    accepted = {value for value, quality in accept_mimetypes if quality > 0}
+    formats = image_formats()
+    for fmt, mimetype, ext in formats:
+        if mimetype in accepted:
+            return fmt, mimetype, ext
+    return formats[-1]
+
+
+def choose_width(requested, original_width):
+    """Snap a requested width up to the ladder, never upscaling the source"""
+    if not requested:
+        return original_width
+    for width in IMAGE_WIDTHS:
+        if width >= requested:
+            return min(width, original_width)
+    return min(IMAGE_WIDTHS[-1], original_width)
+
+
+def source_info(path):
+    """(content hash, width) of a source image, recomputed only when the file changes"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    info = _source_cache.get(key)
+    if info is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        from PIL import Image
+        with Image.open(path) as image:
+            width = image.width
+        info = (sha.hexdigest()[:16], width)
+        _source_cache[key] = info
+    return info
+
+
+def available_widths(path):
+    """Widths on the ladder a source can be served at, plus its own width"""
+    original_width = source_info(path)[1]
+    return sorted({choose_width(width, original_width) for width in IMAGE_WIDTHS} | {original_width})
+
+
+def _variant_name(path, digest, width, ext):
+    stem = os.path.splitext(os.path.basename(path))[0].replace(' ', '-').lower()
+    return f"{stem}-{digest}-{width}w.{ext}"
+
+
+def _encode(path, dest, width, fmt):
+    from PIL import Image
+    with Image.open(path) as image:
+        image.load()
+        if width < image.width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if fmt == 'JPEG' and image.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(tmp, fmt, **SAVE_OPTIONS[fmt])
+    os.replace(tmp, dest)
+
+
+def get_variant(path, cache_dir, width, fmt, ext):
+    """Return the on-disk path of a variant, generating it if needed"""
+    digest = source_info(path)[0]
+    dest = os.path.join(cache_dir, _variant_name(path, digest, width, ext))
+    if not os.path.exists(dest):
+        os.makedirs(cache_dir, exist_ok=True)
+        with _build_lock:
+            if not os.path.exists(dest):
+                _encode(path, dest, width, fmt)
+    return dest
+
+
+def build_all_variants(path, cache_dir):
+    """Generate every width and format of one source image"""
+    return [get_variant(path, cache_dir, width, fmt, ext)
+            for width in available_widths(path) for fmt, _, ext in image_formats()]
@@ -0,0 +1,135 @@
+"""
+Invite list import from CSV or JSON lines.
+
+Records need a name and an email, and may give a party_size (seats invited,
+1 by default). CSV files need a header row naming those columns. Records are
+validated and deduplicated by normalized email in a single pass, then
+inserted in chunks of executemany INSERTs inside one transaction, so an
+import is applied completely or not at all. Emails already on the invite list
+are left as they are, which makes re-importing an updated list safe.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from models import Invitation, db, normalize_email
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl'
+}
+REQUIRED_FIELDS = ('name', 'email')
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+MAX_PARTY_SIZE = 20
+MAX_REPORTED_ERRORS = 50
+
+
+def detect_format(filename):
+    """'csv' or 'jsonl' from the file extension; raises ValueError otherwise"""
+    fmt = FORMATS.get(os.path.splitext(filename or '')[1].lower())
+    if fmt is None:
+        raise ValueError('Invite lists must be .csv or .jsonl files')
+    return fmt
+
+
+def read_records(stream, fmt):
+    """Yield (line number, record) from a binary stream, without reading it all at once"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+    else:
+        raise ValueError(f'Unknown invite list format {fmt!r}')
+
+
+def validate_invitation(record):
+    """Return (values, None) for a valid record, or (None, reason)"""
+    if not isinstance(record, dict):
+        return None, 'not a JSON object'
+    name = str(record.get('name') or '').strip()
+    email = str(record.get('email') or '').strip()
+    if not name or len(name) > 100:
+        return None, 'name is missing or longer than 100 characters'
+    if len(email) > 120 or not EMAIL_PATTERN.match(email):
+        return None, f'invalid email {email!r}'
+    try:
+        party_size = int(record.get('party_size') or 1)
+    except (TypeError, ValueError):
+        return None, f"invalid party_size {record.get('party_size')!r}"
+    if not 1 <= party_size <= MAX_PARTY_SIZE:
+        return None, f'party_size must be between 1 and {MAX_PARTY_SIZE}'
+    return {'name': name, 'email': email, 'email_normalized': normalize_email(email), 'party_size': party_size}, None
+
+
+def import_invitations(records, chunk_size=1000):
+    """Validate, deduplicate and insert (line number, record) pairs; returns a report.
+
+    Rejected records are counted and the first MAX_REPORTED_ERRORS are listed
+    with their line numbers. Any database error rolls the whole import back.
+    """
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    report = {'rows': 0, 'imported': 0, 'already_invited': 0, 'duplicates': 0, 'invalid': 0, 'errors': []}
+    seen = set()
+    chunk = []
+
+    def reject(line_number, counter, reason):
+        report[counter] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'error': reason})
+
+    def flush():
+        existing = set(db.session.execute(
+            db.select(Invitation.email_normalized)
+            .where(Invitation.email_normalized.in_([values['email_normalized'] for values in chunk]))
+        ).scalars())
+        new = [values for values in chunk if values['email_normalized'] not in existing]
+        if new:
+            db.session.execute(db.insert(Invitation), new)
+        report['imported'] += len(new)
+        report['already_invited'] += len(chunk) - len(new)
+        chunk.clear()
+
+    try:
+        for line_number, record in records:
+            report['rows'] += 1
+            values, error = validate_invitation(record)
+            if error is not None:
+                reject(line_number, 'invalid', error)
+            elif values['email_normalized'] in seen:
+                reject(line_number, 'duplicates', f"duplicate email {values['email']!r}")
+            else:
+                seen.add(values['email_normalized'])
+                values['created_at'] = now
+                chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    flush()
+        if chunk:
+            flush()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['rows'] / elapsed) if elapsed else 0
+    return report
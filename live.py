@@ -0,0 +1,39 @@
+"""
+Server-Sent Events plumbing for the admin dashboard's live updates.
+
+ChangeSignal wakes every stream in the process as soon as a request commits
+a change, so a coordinator sees an RSVP from the same worker immediately.
+Changes committed by other workers are picked up by the streams' periodic
+index probe instead; the signal only makes the common case instant.
+"""
+
+import json
+import threading
+
+
+class ChangeSignal:
+    """A generation counter that waiting threads can block on"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self):
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """Block until the generation moves past `seen` or `timeout` runs out; return it"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != seen, timeout)
+            return self.generation
+
+
+def sse_message(event, data, event_id=None):
+    """Format one SSE message; `data` is sent as JSON"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,57 @@
+"""
+Structured logging.
+
+Log calls pass their data as `extra` fields instead of formatting it into
+the message, e.g. logger.info('RSVP stored', extra={'guest_id': 7}). The
+JSON formatter writes one object per line for log collectors; the text
+formatter appends the fields as key=value pairs for reading in a terminal.
+"""
+
+import json
+import logging
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def extra_fields(record):
+    return {name: value for name, value in vars(record).items() if name not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **extra_fields(record)
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{name}={value!r}' for name, value in fields.items())
+        return line
+
+
+FORMATTERS = {
+    'json': JsonFormatter,
+    'text': TextFormatter
+}
+
+
+def configure_logging(level='INFO', fmt='json'):
+    """Send application logs to stderr, unless the host process already set up logging"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(FORMATTERS.get(fmt, JsonFormatter)())
+    logging.basicConfig(level=level.upper(), handlers=[handler])
@@ -0,0 +1,134 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are kept per process, keyed by their label values,
+and rendered on demand by the /metrics endpoint. Under gunicorn every worker
+keeps its own numbers and a scrape sees only the worker that answered it,
+so read them as a sample of the traffic rather than exact totals.
+"""
+
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; tuned for web requests and database queries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(list(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing count"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, pairs, value):
+        return [f'{self.name}_total{_format_labels(pairs)} {_format_value(value)}']
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `le` buckets, with their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket plus +Inf, then the running sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def _render_series(self, pairs, series):
+        lines = []
+        cumulative = 0
+        for bound, observed in zip(self.buckets + (math.inf,), series[:-1]):
+            cumulative += observed
+            lines.append(f'{self.name}_bucket{_format_labels(pairs + [("le", _format_value(bound))])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(pairs)} {_format_value(series[-1])}')
+        lines.append(f'{self.name}_count{_format_labels(pairs)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """The set of metrics exposed together by one /metrics endpoint"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,111 @@
+"""
+Schema management, run explicitly with `flask --app app upgrade-db`.
+
+Creates missing tables and columns, migrates data written by older
+versions, then creates missing indexes. It is safe to run on every deploy;
+web workers never touch the schema themselves.
+"""
+
+import json
+import logging
+
+from models import EmailOutbox, Guest, GuestMember, RoomDemand, RsvpStats, db, normalize_name, rebuild_rsvp_stats
+
+logger = logging.getLogger(__name__)
+
+def backfill_guest_members(chunk_size=500):
+    """Copy names from the legacy guest_names JSON column into GuestMember rows"""
+    has_members = db.select(GuestMember.id).where(GuestMember.guest_id == Guest.id).exists()
+    backfilled = 0
+    last_id = 0
+    while True:
+        partition = db.session.execute(
+            db.select(Guest.id, Guest.name, Guest.guest_names)
+            .where(~has_members, Guest.id > last_id)
+            .order_by(Guest.id)
+            .limit(chunk_size)
+        ).all()
+        if not partition:
+            break
+        rows = []
+        for guest_id, name, guest_names in partition:
+            try:
+                names = json.loads(guest_names) if guest_names else []
+            except ValueError:
+                names = []
+            for position, member_name in enumerate(names or [name]):
+                rows.append({
+                    'guest_id': guest_id,
+                    'position': position,
+                    'name': member_name,
+                    'name_normalized': normalize_name(member_name)
+                })
+        db.session.execute(db.insert(GuestMember), rows)
+        backfilled += len(partition)
+        last_id = partition[-1].id
+    db.session.commit()
+    return backfilled
+
+def deduplicate_guests():
+    """Fill email_normalized and keep only the newest party for each address"""
+    db.session.execute(
+        db.update(Guest)
+        .where(Guest.email_normalized.is_(None))
+        .values(email_normalized=db.func.lower(db.func.trim(Guest.email)))
+    )
+    duplicated = db.session.execute(
+        db.select(Guest.email_normalized)
+        .group_by(Guest.email_normalized)
+        .having(db.func.count(Guest.id) > 1)
+    ).scalars().all()
+    removed = 0
+    for email_normalized in duplicated:
+        parties = Guest.query.filter_by(email_normalized=email_normalized) \
+            .order_by(Guest.created_at.desc(), Guest.id.desc()).all()
+        for guest in parties[1:]:
+            db.session.execute(db.update(EmailOutbox).where(EmailOutbox.guest_id == guest.id).values(guest_id=None))
+            db.session.delete(guest)
+            removed += 1
+    db.session.commit()
+    return removed
+
+def backfill_guest_updated_at():
+    """Start the change feed of existing guests at their creation time"""
+    db.session.execute(
+        db.update(Guest).where(Guest.updated_at.is_(None)).values(updated_at=Guest.created_at)
+    )
+    db.session.commit()
+
+def add_missing_columns():
+    """ALTER existing tables to add columns that were added to the models"""
+    inspector = db.inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.execute(db.text(f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}'))
+
+def upgrade_schema():
+    """Create missing tables and columns, migrate data, then create missing indexes"""
+    new_tables = set(db.metadata.tables) - set(db.inspect(db.engine).get_table_names())
+    db.create_all()
+    add_missing_columns()
+    backfill_guest_updated_at()
+    backfilled = backfill_guest_members()
+    if backfilled:
+        logger.info('Backfilled party members', extra={'guests': backfilled})
+    removed = deduplicate_guests()
+    if removed:
+        logger.info('Removed older duplicate RSVPs', extra={'removed': removed})
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    # Maintained aggregates start from a full recomputation, including the
+    # room demand histogram on databases that predate it
+    if db.session.get(RsvpStats, 1) is None or RoomDemand.__tablename__ in new_tables:
+        rebuild_rsvp_stats()
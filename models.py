@@ -0,0 +1,408 @@
+"""
+Database models and the running RSVP statistics.
+
+`db` is created unbound and attached to the Flask app by create_app in
+app.py. The statistics row is kept current by mapper events on Guest, and by
+the explicit deltas applied after Core statements that bypass them.
+"""
+
+import importlib
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+class Guest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    email_normalized = db.Column(db.String(120))  # Trimmed, lower-cased email; one party per address
+    guest_count = db.Column(db.Integer, default=1)
+    guest_names = db.Column(db.Text)  # Legacy JSON list of names, superseded by GuestMember
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Live admin feed cursor
+    
+    # Welcome Lunch
+    welcome_lunch = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
+    
+    # Wedding Day
+    wedding_attendance = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
+    
+    # Accommodation
+    accommodation = db.Column(db.String(10), nullable=False)  # 'yes', 'no'
+    
+    # Farewell Lunch
+    farewell_lunch = db.Column(db.String(20), nullable=False)  # 'attending', 'not_attending'
+    
+    # Keyset pagination runs newest first on (created_at, id); the filtered
+    # admin views use the same ordering behind their filter column, and the
+    # live feed reads changes in (updated_at, id) order
+    __table_args__ = (
+        db.Index('ix_guest_email_normalized', 'email_normalized', unique=True),
+        db.Index('ix_guest_created_at_id', 'created_at', 'id'),
+        db.Index('ix_guest_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_guest_wedding_attendance_created_at_id', 'wedding_attendance', 'created_at', 'id'),
+        db.Index('ix_guest_welcome_lunch_created_at_id', 'welcome_lunch', 'created_at', 'id'),
+        db.Index('ix_guest_farewell_lunch_created_at_id', 'farewell_lunch', 'created_at', 'id'),
+        db.Index('ix_guest_accommodation_created_at_id', 'accommodation', 'created_at', 'id'),
+    )
+    
+    members = db.relationship('GuestMember', order_by='GuestMember.position',
+                              cascade='all, delete-orphan', back_populates='guest')
+    
+    def to_dict(self):
+        guest_names = [member.name for member in self.members] or [self.name]
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'guest_count': self.guest_count,
+            'guest_names': guest_names,
+            'message': self.message,
+            'welcome_lunch': self.welcome_lunch,
+            'wedding_attendance': self.wedding_attendance,
+            'accommodation': self.accommodation,
+            'farewell_lunch': self.farewell_lunch,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M') if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'is_new': self.created_at == self.updated_at
+        }
+    
+    def __repr__(self):
+        return f'<Guest {self.name}>'
+
+class GuestMember(db.Model):
+    """One person in an RSVP party; position 0 is the primary contact"""
+    id = db.Column(db.Integer, primary_key=True)
+    guest_id = db.Column(db.Integer, db.ForeignKey('guest.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    name = db.Column(db.String(100), nullable=False)
+    name_normalized = db.Column(db.String(100), nullable=False, index=True)  # Lower-cased for search
+    
+    guest = db.relationship('Guest', back_populates='members')
+    
+    def __repr__(self):
+        return f'<GuestMember {self.name}>'
+
+def normalize_name(name):
+    return ' '.join(name.split()).lower()
+
+def normalize_email(email):
+    return email.strip().lower()
+
+class Invitation(db.Model):
+    """A party on the invite list; it has replied once a Guest has the same normalized email"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    email_normalized = db.Column(db.String(120), nullable=False)
+    party_size = db.Column(db.Integer, nullable=False, default=1)  # Seats invited
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_invitation_email_normalized', 'email_normalized', unique=True),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'party_size': self.party_size,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+def awaiting_reply():
+    """Select invitations without an RSVP from the same email, an anti-join on both unique indexes"""
+    return db.select(Invitation).where(
+        ~db.select(Guest.id).where(Guest.email_normalized == Invitation.email_normalized).exists()
+    )
+
+REMINDER_AUDIENCES = ('no_reply', 'partial', 'all')
+
+def reminder_audience(audience):
+    """Select (Invitation, replied seats or None) for invitations to remind.
+
+    'no_reply' is invitations without an RSVP, 'partial' those whose RSVP
+    covers fewer seats than were invited, and 'all' both. It is a left join
+    on the unique normalized email indexes.
+    """
+    no_reply = Guest.id.is_(None)
+    partial = Guest.guest_count < Invitation.party_size
+    condition = {'no_reply': no_reply, 'partial': partial, 'all': db.or_(no_reply, partial)}[audience]
+    return db.select(Invitation, Guest.guest_count) \
+        .outerjoin(Guest, Guest.email_normalized == Invitation.email_normalized) \
+        .where(condition)
+
+class ReminderCampaign(db.Model):
+    """A reminder sent to every invitation in an audience, from scheduled_at on"""
+    id = db.Column(db.Integer, primary_key=True)
+    audience = db.Column(db.String(20), nullable=False)  # One of REMINDER_AUDIENCES
+    status = db.Column(db.String(20), nullable=False, default='scheduled')  # 'scheduled', 'sending', 'completed'
+    scheduled_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    lease_until = db.Column(db.DateTime)  # Held by the dispatcher currently sending a batch
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_reminder_campaign_status_scheduled_at', 'status', 'scheduled_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'audience': self.audience,
+            'status': self.status,
+            'scheduled_at': self.scheduled_at.isoformat() if self.scheduled_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+    def __repr__(self):
+        return f'<ReminderCampaign {self.id} {self.status}>'
+
+class ReminderDelivery(db.Model):
+    """One recipient of a reminder campaign and how far sending it got.
+
+    A delivery is committed as 'sending' before its batch goes to Brevo, so a
+    dispatcher that dies mid-batch leaves it there and it is never sent twice.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('reminder_campaign.id', ondelete='CASCADE'), nullable=False)
+    invitation_id = db.Column(db.Integer, db.ForeignKey('invitation.id', ondelete='CASCADE'), nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'skipped', 'failed'
+    claimed_at = db.Column(db.DateTime)  # When its batch was handed to Brevo; the send budget counts these
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_reminder_delivery_campaign_invitation', 'campaign_id', 'invitation_id', unique=True),
+        db.Index('ix_reminder_delivery_campaign_status_id', 'campaign_id', 'status', 'id'),
+        db.Index('ix_reminder_delivery_claimed_at', 'claimed_at'),
+    )
+
+    def __repr__(self):
+        return f'<ReminderDelivery {self.id} {self.status}>'
+
+class EmailOutbox(db.Model):
+    """Outbound email queued in the same transaction as the RSVP that triggered it"""
+    id = db.Column(db.Integer, primary_key=True)
+    guest_id = db.Column(db.Integer, db.ForeignKey('guest.id'))
+    kind = db.Column(db.String(40), nullable=False, default='rsvp_confirmation')
+    recipient = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON keyword arguments for the sender
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    guest = db.relationship('Guest')
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status}>'
+
+class RsvpStats(db.Model):
+    """Running RSVP totals for the admin dashboard, kept in a single row (id 1)"""
+    id = db.Column(db.Integer, primary_key=True)
+    total_primary_contacts = db.Column(db.Integer, nullable=False, default=0)
+    total_guests = db.Column(db.Integer, nullable=False, default=0)
+    wedding_attending = db.Column(db.Integer, nullable=False, default=0)
+    welcome_lunch_attending = db.Column(db.Integer, nullable=False, default=0)
+    farewell_lunch_attending = db.Column(db.Integer, nullable=False, default=0)
+    accommodation_needed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in STAT_FIELDS}
+
+class RoomDemand(db.Model):
+    """Parties that need accommodation, counted by party size, for room planning"""
+    __tablename__ = 'room_demand'
+    party_size = db.Column(db.Integer, primary_key=True)
+    parties = db.Column(db.Integer, nullable=False, default=0)
+
+STAT_FIELDS = (
+    'total_primary_contacts',
+    'total_guests',
+    'wedding_attending',
+    'welcome_lunch_attending',
+    'farewell_lunch_attending',
+    'accommodation_needed'
+)
+
+def _stats_query():
+    """Single aggregate over the guest table producing every dashboard statistic"""
+    def guests_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, Guest.guest_count), else_=0)), 0)
+
+    return db.select(
+        db.func.count(Guest.id),
+        db.func.coalesce(db.func.sum(Guest.guest_count), 0),
+        guests_where(Guest.wedding_attendance == 'attending'),
+        guests_where(Guest.welcome_lunch == 'attending'),
+        guests_where(Guest.farewell_lunch == 'attending'),
+        guests_where(Guest.accommodation == 'yes')
+    )
+
+def compute_rsvp_stats(connection=None):
+    """Compute the statistics from scratch with one SQL aggregate"""
+    row = (connection or db.session).execute(_stats_query()).one()
+    return dict(zip(STAT_FIELDS, (int(value) for value in row)))
+
+def compute_room_demand(connection=None):
+    """Parties needing accommodation by party size, from one grouped aggregate"""
+    rows = (connection or db.session).execute(
+        db.select(Guest.guest_count, db.func.count(Guest.id))
+        .where(Guest.accommodation == 'yes', Guest.guest_count > 0)
+        .group_by(Guest.guest_count)
+    )
+    return {party_size: parties for party_size, parties in rows}
+
+def get_room_demand():
+    """Read the maintained room demand histogram, {party size: parties}"""
+    return {party_size: parties for party_size, parties in db.session.execute(
+        db.select(RoomDemand.party_size, RoomDemand.parties).where(RoomDemand.parties > 0)
+    )}
+
+def rebuild_rsvp_stats():
+    """Recompute the statistics row and the room demand from the guest table and store them"""
+    db.session.execute(db.delete(RoomDemand))
+    demand = compute_room_demand()
+    if demand:
+        db.session.execute(db.insert(RoomDemand), [
+            {'party_size': party_size, 'parties': parties} for party_size, parties in demand.items()
+        ])
+    stats = compute_rsvp_stats()
+    row = db.session.get(RsvpStats, 1)
+    if row is None:
+        row = RsvpStats(id=1)
+        db.session.add(row)
+    for field, value in stats.items():
+        setattr(row, field, value)
+    row.updated_at = datetime.utcnow()
+    db.session.commit()
+    return stats
+
+def get_rsvp_stats():
+    """Read the maintained statistics row, building it on first use"""
+    row = db.session.get(RsvpStats, 1)
+    if row is None:
+        return rebuild_rsvp_stats()
+    return row.to_dict()
+
+def guest_stat_contribution(guest_count, wedding_attendance, welcome_lunch, farewell_lunch, accommodation):
+    """How much a single guest row adds to each statistic"""
+    guest_count = guest_count or 0
+    return {
+        'total_primary_contacts': 1,
+        'total_guests': guest_count,
+        'wedding_attending': guest_count if wedding_attendance == 'attending' else 0,
+        'welcome_lunch_attending': guest_count if welcome_lunch == 'attending' else 0,
+        'farewell_lunch_attending': guest_count if farewell_lunch == 'attending' else 0,
+        'accommodation_needed': guest_count if accommodation == 'yes' else 0
+    }
+
+STAT_SOURCE_COLUMNS = ('guest_count', 'wedding_attendance', 'welcome_lunch', 'farewell_lunch', 'accommodation')
+
+def _current_contribution(guest):
+    return guest_stat_contribution(*(getattr(guest, column) for column in STAT_SOURCE_COLUMNS))
+
+def _previous_contribution(guest):
+    state = db.inspect(guest)
+    values = []
+    for column in STAT_SOURCE_COLUMNS:
+        history = state.attrs[column].history
+        values.append(history.deleted[0] if history.deleted else getattr(guest, column))
+    return guest_stat_contribution(*values)
+
+def apply_stats_delta(connection, delta):
+    """Add `delta` to the statistics row in `connection`'s transaction"""
+    changes = {field: getattr(RsvpStats, field) + amount for field, amount in delta.items() if amount}
+    if not changes:
+        return
+    result = connection.execute(
+        db.update(RsvpStats).where(RsvpStats.id == 1).values(updated_at=datetime.utcnow(), **changes)
+    )
+    if result.rowcount == 0:
+        # No statistics row yet; the flushed guest is already visible to this connection
+        connection.execute(db.insert(RsvpStats).values(id=1, updated_at=datetime.utcnow(), **compute_rsvp_stats(connection)))
+
+def room_party_size(guest_count, accommodation):
+    """The room demand bucket a party counts towards, or None"""
+    return guest_count if accommodation == 'yes' and guest_count and guest_count > 0 else None
+
+UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+def upsert_insert(dialect_name):
+    """The dialect's INSERT ... ON CONFLICT construct, imported on first use"""
+    if dialect_name not in UPSERT_DIALECTS:
+        return None
+    return importlib.import_module(f'sqlalchemy.dialects.{dialect_name}').insert
+
+def apply_room_demand_delta(connection, old_size, new_size):
+    """Move one party between room demand buckets in `connection`'s transaction.
+
+    A bucket that does not exist yet is created from a count of the matching
+    guests (the flushed guest is already visible to this connection). Where
+    the dialect supports it this is a single INSERT ... ON CONFLICT DO UPDATE,
+    so two transactions opening the same bucket do not both insert it.
+    """
+    if old_size == new_size:
+        return
+    dialect_insert = upsert_insert(connection.dialect.name)
+    for party_size, amount in ((old_size, -1), (new_size, 1)):
+        if party_size is None:
+            continue
+        parties = (
+            db.select(db.func.count(Guest.id))
+            .where(Guest.accommodation == 'yes', Guest.guest_count == party_size)
+            .scalar_subquery()
+        )
+        if dialect_insert is not None:
+            connection.execute(
+                dialect_insert(RoomDemand).values(party_size=party_size, parties=parties)
+                .on_conflict_do_update(index_elements=[RoomDemand.party_size],
+                                       set_={'parties': RoomDemand.parties + amount})
+            )
+            continue
+        result = connection.execute(
+            db.update(RoomDemand).where(RoomDemand.party_size == party_size)
+            .values(parties=RoomDemand.parties + amount)
+        )
+        if result.rowcount == 0:
+            connection.execute(db.insert(RoomDemand).values(party_size=party_size, parties=parties))
+
+def _previous_room_party_size(guest):
+    state = db.inspect(guest)
+    values = []
+    for column in ('guest_count', 'accommodation'):
+        history = state.attrs[column].history
+        values.append(history.deleted[0] if history.deleted else getattr(guest, column))
+    return room_party_size(*values)
+
+@db.event.listens_for(Guest, 'after_insert')
+def _stats_after_guest_insert(mapper, connection, guest):
+    apply_stats_delta(connection, _current_contribution(guest))
+    apply_room_demand_delta(connection, None, room_party_size(guest.guest_count, guest.accommodation))
+
+@db.event.listens_for(Guest, 'after_update')
+def _stats_after_guest_update(mapper, connection, guest):
+    old = _previous_contribution(guest)
+    new = _current_contribution(guest)
+    apply_stats_delta(connection, {field: new[field] - old[field] for field in STAT_FIELDS})
+    apply_room_demand_delta(connection, _previous_room_party_size(guest),
+                            room_party_size(guest.guest_count, guest.accommodation))
+
+@db.event.listens_for(Guest, 'after_delete')
+def _stats_after_guest_delete(mapper, connection, guest):
+    apply_stats_delta(connection, {field: -amount for field, amount in _previous_contribution(guest).items()})
+    apply_room_demand_delta(connection, _previous_room_party_size(guest), None)
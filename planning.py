@@ -0,0 +1,154 @@
+"""
+Capacity planning over the whole guest list: event headcounts, catering
+forecasts and room allocation.
+
+Everything here works on the maintained aggregates, not on guest rows: the
+RsvpStats totals and the room demand histogram (parties needing
+accommodation, counted by party size). A plan therefore costs the same at
+a hundred guests as at a hundred thousand, and reflects a changed RSVP as
+soon as that RSVP's transaction has adjusted the aggregates.
+
+Rooms are allocated with best-fit decreasing over the histogram. Parties are
+placed largest first, each whole party in the smallest free room that holds
+it, so a party never shares a room with another. A party larger than every
+free room is split over the fewest free rooms that hold it. Parties that
+still do not fit are reported as unplaced.
+"""
+
+import math
+from collections import namedtuple
+
+RoomType = namedtuple('RoomType', 'name capacity count')
+
+# Planned event -> (RsvpStats field, catered)
+EVENTS = {
+    'welcome_lunch': ('welcome_lunch_attending', True),
+    'wedding': ('wedding_attending', True),
+    'farewell_lunch': ('farewell_lunch_attending', True),
+    'accommodation': ('accommodation_needed', False)
+}
+
+
+def parse_room_types(spec):
+    """Parse 'double:2x20,family:4x5' (name:capacity x rooms) into RoomTypes"""
+    room_types = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            name, size = item.split(':')
+            capacity, count = (int(value) for value in size.lower().split('x'))
+        except ValueError:
+            raise ValueError(f'Invalid room type {item!r}; expected name:CAPACITYxCOUNT') from None
+        if capacity < 1 or count < 0:
+            raise ValueError(f'Invalid room type {item!r}; capacity must be positive')
+        room_types.append(RoomType(name.strip(), capacity, count))
+    return room_types
+
+
+def _rooms_for_split(size, free, by_capacity):
+    """The fewest free rooms that together hold `size` guests, or None"""
+    chosen = []
+    remaining = size
+    available = dict(free)
+    while remaining > 0:
+        fitting = [room for room in by_capacity if available[room.name] and room.capacity >= remaining]
+        room = fitting[0] if fitting else next(
+            (room for room in reversed(by_capacity) if available[room.name]), None
+        )
+        if room is None:
+            return None
+        available[room.name] -= 1
+        chosen.append(room)
+        remaining -= room.capacity
+    return chosen
+
+
+def allocate_rooms(party_sizes, room_types):
+    """Allocate rooms to parties given as {party size: number of parties}"""
+    by_capacity = sorted(room_types, key=lambda room: (room.capacity, room.name))
+    free = {room.name: room.count for room in room_types}
+    guests = dict.fromkeys(free, 0)
+    placed = split = 0
+    unplaced = {}
+    for size in sorted(party_sizes, reverse=True):
+        remaining = party_sizes[size]
+        for room in by_capacity:
+            if not remaining:
+                break
+            if room.capacity >= size and free[room.name]:
+                parties = min(remaining, free[room.name])
+                free[room.name] -= parties
+                guests[room.name] += parties * size
+                placed += parties
+                remaining -= parties
+        while remaining:
+            rooms = _rooms_for_split(size, free, by_capacity)
+            if rooms is None:
+                break
+            left = size
+            for room in rooms:
+                free[room.name] -= 1
+                guests[room.name] += min(room.capacity, left)
+                left -= room.capacity
+            placed += 1
+            split += 1
+            remaining -= 1
+        if remaining:
+            unplaced[size] = remaining
+
+    rooms = [{
+        'type': room.name,
+        'capacity': room.capacity,
+        'available': room.count,
+        'used': room.count - free[room.name],
+        'guests': guests[room.name],
+        'empty_beds': (room.count - free[room.name]) * room.capacity - guests[room.name]
+    } for room in room_types]
+    return {
+        'rooms': rooms,
+        'parties_placed': placed,
+        'parties_split': split,
+        'parties_unplaced': sum(unplaced.values()),
+        'guests_unplaced': sum(size * parties for size, parties in unplaced.items()),
+        'empty_beds': sum(room['empty_beds'] for room in rooms)
+    }
+
+
+def project(confirmed, responded, pending):
+    """Confirmed attendance plus the same share of the guests still to respond"""
+    if not responded:
+        return confirmed
+    return confirmed + round(confirmed / responded * pending)
+
+
+def build_plan(stats, room_demand, room_types, invited_guests=0, catering_buffer=0.0):
+    """Headcounts, catering forecasts and room allocations, confirmed and projected.
+
+    `stats` is the RsvpStats dictionary and `room_demand` the histogram of
+    parties needing accommodation. Without `invited_guests` nothing is
+    pending and the projections equal the confirmed numbers.
+    """
+    responded = stats['total_guests']
+    pending = max(invited_guests - responded, 0)
+    events = {}
+    for event, (field, catered) in EVENTS.items():
+        confirmed = stats[field]
+        projected = project(confirmed, responded, pending)
+        events[event] = {'confirmed': confirmed, 'projected': projected}
+        if catered:
+            events[event]['catering'] = math.ceil(projected * (1 + catering_buffer))
+
+    # Guests still to respond are assumed to bring parties shaped like the
+    # ones already asking for rooms
+    accommodation = events['accommodation']
+    scale = accommodation['projected'] / accommodation['confirmed'] if accommodation['confirmed'] else 1
+    projected_demand = {size: round(parties * scale) for size, parties in room_demand.items()}
+    return {
+        'invited_guests': invited_guests,
+        'responded_guests': responded,
+        'pending_guests': pending,
+        'events': events,
+        'rooms': {
+            'confirmed': allocate_rooms(room_demand, room_types),
+            'projected': allocate_rooms(projected_demand, room_types)
+        }
+    }
@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiting for public write endpoints.
+
+Every key (a client IP, an email address) has a bucket of up to `burst`
+tokens that refills at `per_hour` tokens an hour. A request spends one token
+and is turned away while the bucket is empty. A bucket is two numbers, its
+tokens and when they were counted, and a bucket left idle long enough to
+refill completely behaves exactly like one that was never created, so
+evicting idle buckets loses nothing.
+
+MemoryBuckets keeps the buckets of one process in an LRU capped at
+`max_keys`. SQLiteBuckets keeps them in a small SQLite file of their own, so
+every gunicorn worker on the host spends from the same buckets without
+touching the application database. Both fail open: a limiter that cannot
+answer lets the request through rather than turning guests away.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit:
+    """`burst` requests at once, then `per_hour` requests an hour"""
+
+    __slots__ = ('burst', 'rate')
+
+    def __init__(self, burst, per_hour):
+        self.burst = float(burst)
+        self.rate = per_hour / 3600
+
+    @property
+    def full_after(self):
+        """Seconds an empty bucket takes to refill completely"""
+        return self.burst / self.rate
+
+    def wait(self, tokens):
+        """Seconds until a bucket holding `tokens` has one to spend"""
+        return max(1 - tokens, 0) / self.rate
+
+
+class MemoryBuckets:
+    """Buckets of this process, least recently used evicted beyond `max_keys`"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def spend(self, key, limit):
+        """Spend a token from `key`'s bucket; returns 0, or the seconds to wait when it is empty"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [limit.burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return limit.wait(bucket[0])
+            bucket[0] -= 1
+            return 0
+
+
+class SQLiteBuckets:
+    """Buckets shared by every process on the host through one SQLite file.
+
+    Each spend is a single upsert that only applies when a token is
+    available. Every `prune_every` spends a process deletes the buckets that
+    have refilled completely and, beyond `max_keys`, the least recently used.
+    The file is disposable: it is created on first use and never backed up.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS rate_buckets ('
+        'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS ix_rate_buckets_updated_at ON rate_buckets (updated_at)'
+    )
+    SPEND = (
+        'INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (:key, :burst - 1, :now) '
+        'ON CONFLICT (key) DO UPDATE SET '
+        'tokens = min(:burst, tokens + max(:now - updated_at, 0) * :rate) - 1, updated_at = :now '
+        'WHERE min(:burst, tokens + max(:now - updated_at, 0) * :rate) >= 1 '
+        'RETURNING tokens'
+    )
+
+    def __init__(self, path, max_keys=10000, prune_every=1000, busy_timeout=0.5):
+        self.path = path
+        self.max_keys = max_keys
+        self.prune_every = prune_every
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._spends = 0
+        self._full_after = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+        return connection
+
+    def spend(self, key, limit):
+        """Spend a token from `key`'s bucket; returns 0, or the seconds to wait when it is empty"""
+        now = time.time()
+        params = {'key': key, 'burst': limit.burst, 'rate': limit.rate, 'now': now}
+        try:
+            connection = self._connection()
+            if connection.execute(self.SPEND, params).fetchall():
+                self._after_spend(connection, now, limit)
+                return 0
+            row = connection.execute('SELECT tokens, updated_at FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning('Rate limiter unavailable, allowing request', extra={'error': str(e)})
+            return 0
+        if row is None:
+            return 0
+        tokens, updated_at = row
+        return limit.wait(min(limit.burst, tokens + max(now - updated_at, 0) * limit.rate))
+
+    def _after_spend(self, connection, now, limit):
+        self._full_after = max(self._full_after, limit.full_after)
+        self._spends += 1
+        if self._spends % self.prune_every == 0:
+            self.prune(connection, now)
+
+    def prune(self, connection, now):
+        """Forget full buckets, then the least recently used beyond `max_keys`"""
+        connection.execute('DELETE FROM rate_buckets WHERE updated_at < ?', (now - self._full_after,))
+        connection.execute(
+            'DELETE FROM rate_buckets WHERE key IN '
+            '(SELECT key FROM rate_buckets ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_keys,)
+        )
@@ -0,0 +1,207 @@
+"""
+Reminder campaigns for invitations without an RSVP, or with an RSVP for fewer
+seats than were invited.
+
+Creating a campaign copies its audience into one ReminderDelivery row per
+recipient with a single INSERT ... SELECT over the indexed join. Dispatchers
+then send it a batch at a time:
+
+- Only the oldest due campaign is sent, by whichever dispatcher holds its
+  lease, so several workers never send in parallel.
+- A batch never exceeds the per-minute send budget, counted from the
+  deliveries claimed in the last minute, so the budget holds across
+  dispatchers and restarts.
+- A batch is committed as 'sending' before it goes to Brevo and as 'sent'
+  afterwards. A dispatcher that dies in between leaves it 'sending'. The
+  next holder of the campaign marks those deliveries failed rather than risk
+  a second copy; retry_failed queues them again on request.
+- Recipients who reply before their batch is sent are skipped.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from brevo import BrevoRateLimited
+from emails import REMINDER_SUBJECT, render_reminder_email
+from models import REMINDER_AUDIENCES, Guest, Invitation, ReminderCampaign, ReminderDelivery, db, reminder_audience
+
+BUDGET_WINDOW = timedelta(minutes=1)
+INTERRUPTED_ERROR = 'Dispatcher stopped while sending; not resent in case it was delivered'
+
+
+def create_campaign(audience, scheduled_at=None):
+    """Schedule a reminder to everyone in `audience`; returns (campaign, recipients)"""
+    if audience not in REMINDER_AUDIENCES:
+        raise ValueError(f"Audience must be one of {', '.join(REMINDER_AUDIENCES)}")
+    campaign = ReminderCampaign(audience=audience, scheduled_at=scheduled_at or datetime.utcnow())
+    db.session.add(campaign)
+    db.session.flush()
+    result = db.session.execute(db.insert(ReminderDelivery).from_select(
+        ['campaign_id', 'invitation_id', 'recipient'],
+        reminder_audience(audience).with_only_columns(db.literal(campaign.id), Invitation.id, Invitation.email)
+    ))
+    db.session.commit()
+    return campaign, result.rowcount
+
+
+def campaign_progress(campaign_ids):
+    """Delivery counts by status for each campaign, {campaign id: {status: count}}"""
+    progress = {campaign_id: {} for campaign_id in campaign_ids}
+    rows = db.session.execute(
+        db.select(ReminderDelivery.campaign_id, ReminderDelivery.status, db.func.count(ReminderDelivery.id))
+        .where(ReminderDelivery.campaign_id.in_(progress))
+        .group_by(ReminderDelivery.campaign_id, ReminderDelivery.status)
+    )
+    for campaign_id, status, count in rows:
+        progress[campaign_id][status] = count
+    return progress
+
+
+def due_campaign(now=None):
+    """The oldest scheduled or partly sent campaign that is due, or None"""
+    return db.session.execute(
+        db.select(ReminderCampaign)
+        .where(ReminderCampaign.status.in_(['scheduled', 'sending']),
+               ReminderCampaign.scheduled_at <= (now or datetime.utcnow()))
+        .order_by(ReminderCampaign.scheduled_at, ReminderCampaign.id)
+        .limit(1)
+    ).scalar()
+
+
+def claim_campaign(lease_seconds):
+    """Lease the due campaign, or return None when there is none or another dispatcher holds it"""
+    now = datetime.utcnow()
+    campaign = due_campaign(now)
+    if campaign is None:
+        return None
+    result = db.session.execute(
+        db.update(ReminderCampaign)
+        .where(ReminderCampaign.id == campaign.id,
+               db.or_(ReminderCampaign.lease_until.is_(None), ReminderCampaign.lease_until < now))
+        .values(status='sending', lease_until=now + timedelta(seconds=lease_seconds))
+    )
+    db.session.commit()
+    if result.rowcount != 1:
+        return None
+    db.session.refresh(campaign)
+    return campaign
+
+
+def send_budget(per_minute, now):
+    """Reminders that may still be sent in the minute ending at `now`"""
+    claimed = db.session.execute(
+        db.select(db.func.count(ReminderDelivery.id)).where(ReminderDelivery.claimed_at > now - BUDGET_WINDOW)
+    ).scalar()
+    return max(per_minute - claimed, 0)
+
+
+def dispatch_reminder_batch(client, sender, jinja_env, per_minute, batch_size, lease_seconds):
+    """Send the next batch of the due campaign. Returns delivery counts by outcome.
+
+    Nothing is sent while the budget is spent or Brevo is rate limiting; the
+    campaign is completed once no delivery is left pending. The batch goes to
+    Brevo in chunks of the client's batch_size and each chunk's outcome is
+    recorded on its own, so a chunk that was delivered before a later one
+    failed or was rate limited is never sent again. Deliveries are
+    read as plain rows and updated by id, so the commits around the send do
+    not reload them one at a time.
+    """
+    campaign = claim_campaign(lease_seconds)
+    if campaign is None:
+        return Counter()
+    campaign_id, audience = campaign.id, campaign.audience
+    outcomes = Counter()
+    db.session.execute(
+        db.update(ReminderDelivery)
+        .where(ReminderDelivery.campaign_id == campaign_id, ReminderDelivery.status == 'sending')
+        .values(status='failed', last_error=INTERRUPTED_ERROR)
+    )
+
+    now = datetime.utcnow()
+    limit = min(batch_size, send_budget(per_minute, now))
+    deliveries = db.session.execute(
+        db.select(ReminderDelivery.id, ReminderDelivery.invitation_id, ReminderDelivery.recipient)
+        .where(ReminderDelivery.campaign_id == campaign_id, ReminderDelivery.status == 'pending')
+        .order_by(ReminderDelivery.id)
+        .limit(limit)
+    ).all() if limit else []
+
+    # Check the audience again, for anyone who replied after the campaign was created
+    still_due = {row.id: row for row in db.session.execute(
+        reminder_audience(audience)
+        .with_only_columns(Invitation.id, Invitation.name, Invitation.party_size, Guest.guest_count)
+        .where(Invitation.id.in_([delivery.invitation_id for delivery in deliveries]))
+    )}
+    batch = []
+    messages = []
+    for delivery_id, invitation_id, recipient in deliveries:
+        invitation = still_due.get(invitation_id)
+        if invitation is None:
+            continue
+        batch.append(delivery_id)
+        messages.append({
+            'to': [{'email': recipient, 'name': invitation.name}],
+            'subject': REMINDER_SUBJECT,
+            'htmlContent': render_reminder_email(jinja_env, invitation.name, invitation.party_size,
+                                                 invitation.guest_count or 0)
+        })
+    outcomes['skipped'] = len(deliveries) - len(batch)
+    if outcomes['skipped']:
+        db.session.execute(
+            db.update(ReminderDelivery)
+            .where(ReminderDelivery.id.in_([row.id for row in deliveries]), ReminderDelivery.id.notin_(batch))
+            .values(status='skipped')
+        )
+    if batch:
+        _set_status(batch, status='sending', claimed_at=now)
+    db.session.commit()
+
+    for start in range(0, len(batch), client.batch_size):
+        chunk = batch[start:start + client.batch_size]
+        try:
+            client.send_batch(sender, messages[start:start + client.batch_size])
+        except BrevoRateLimited:
+            _set_status(batch[start:], status='pending', claimed_at=None)
+            outcomes['rate_limited'] = len(batch) - start
+            break
+        except Exception as e:
+            _set_status(chunk, status='failed', last_error=str(e))
+            outcomes['failed'] += len(chunk)
+        else:
+            _set_status(chunk, status='sent', sent_at=datetime.utcnow())
+            outcomes['sent'] += len(chunk)
+        db.session.commit()
+
+    pending = db.session.execute(
+        db.select(ReminderDelivery.id)
+        .where(ReminderDelivery.campaign_id == campaign_id, ReminderDelivery.status == 'pending')
+        .limit(1)
+    ).first()
+    db.session.execute(
+        db.update(ReminderCampaign).where(ReminderCampaign.id == campaign_id)
+        .values(lease_until=None,
+                **({} if pending else {'status': 'completed', 'completed_at': datetime.utcnow()}))
+    )
+    db.session.commit()
+    return +outcomes
+
+
+def _set_status(delivery_ids, **values):
+    db.session.execute(db.update(ReminderDelivery).where(ReminderDelivery.id.in_(delivery_ids)).values(**values))
+
+
+def retry_failed(campaign_id):
+    """Queue a campaign's failed deliveries again; returns how many"""
+    result = db.session.execute(
+        db.update(ReminderDelivery)
+        .where(ReminderDelivery.campaign_id == campaign_id, ReminderDelivery.status == 'failed')
+        .values(status='pending', claimed_at=None, last_error=None)
+    )
+    if result.rowcount:
+        db.session.execute(
+            db.update(ReminderCampaign)
+            .where(ReminderCampaign.id == campaign_id)
+            .values(status='sending', completed_at=None)
+        )
+    db.session.commit()
+    return result.rowcount
@@ -167,6 +167,17 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // RSVP Form AJAX Submission
     if (form) {
+        // One idempotency key per filled-in form: submitting the same answers
+        // again (a double click, or a retry after a lost response) is answered
+        // from the server's idempotency cache instead of being stored twice.
+        // Editing the form or a successful submission starts a new key.
+        let idempotencyKey = null;
+        const newIdempotencyKey = () => (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
+        form.addEventListener('input', () => { idempotencyKey = null; });
+        form.addEventListener('change', () => { idempotencyKey = null; });
+        
         form.addEventListener('submit', function(e) {
             e.preventDefault();
             
@@ -204,9 +215,14 @@ document.addEventListener('DOMContentLoaded', function() {
             submitBtn.disabled = true;
             submitBtn.textContent = 'Submitting...';
             
+            idempotencyKey = idempotencyKey || newIdempotencyKey();
+            
             // Submit form via AJAX
             fetch('/submit_rsvp', {
                 method: 'POST',
+                headers: {
+                    'Idempotency-Key': idempotencyKey
+                },
                 body: formData
             })
             .then(response => {
@@ -217,6 +233,8 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
                 if (data.success) {
+                    idempotencyKey = null;
+                    
                     // Hide the form immediately after successful submission
                     form.style.display = 'none';
                     